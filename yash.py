@@ -7,8 +7,30 @@ import shutil
 import platform
 import getpass
 import subprocess
+import re
 import json
-import urllib.request
+import mmap
+import array
+import pickle
+import tempfile
+import io
+import heapq
+import collections
+import itertools
+import concurrent.futures
+import fnmatch
+import functools
+import hashlib
+import asyncio
+import threading
+import contextlib
+import socket
+import signal
+import codecs
+import zipfile
+import atexit
+import http.client
+from urllib.parse import urlsplit, urljoin
 from datetime import datetime
 
 # ANSI color codes for terminal styling
@@ -32,10 +54,95 @@ IS_MACOS = platform.system() == "Darwin"
 command_history = []
 history_position = 0
 
+# Exit status of the last command, and the one $? expands to while a command runs
+last_exit_status = 0
+previous_exit_status = 0
+
+# Aliases, shell functions and the positional parameters of running functions
+aliases = {}
+shell_functions = {}
+function_args_stack = []
+
+# Previous /proc/stat sample, so CPU usage can be measured between calls
+cpu_sample = None
+
+# Last system information report as (time, text), and executables found on PATH
+sysinfo_snapshot = None
+command_paths = {}
+
+# Release info from the last update check, and the state of a running update
+last_release = {}
+update_state = {"status": "idle", "version": None, "done": 0, "total": 0, "error": None, "reported": True}
+
 # Version information
 CURRENT_VERSION = "2.2"
 GITHUB_REPO = "https://api.github.com/repos/yazn1q3/yash/releases/latest"
 
+# Per-user directory for Yash caches and state
+YASH_HOME = os.path.join(os.path.expanduser("~"), ".yash")
+
+# HTTP client settings
+HTTP_TIMEOUT = 5
+HTTP_USER_AGENT = f"Yash-Terminal/{CURRENT_VERSION}"
+HTTP_CACHE_DIR = os.path.join(YASH_HOME, "http-cache")
+HTTP_CACHE_TTL = 3600  # Seconds a cached response is served without revalidating
+HTTP_CACHE_MAX_BYTES = 16 * 1024 * 1024
+HTTP_POOL_SIZE = 4  # Idle keep-alive connections kept per host
+WEATHER_CACHE_TTL = 600
+
+# Startup file, and the cache of its compiled form
+RC_FILE = os.path.join(os.path.expanduser("~"), ".yashrc")
+RC_CACHE_FILE = os.path.join(YASH_HOME, "yashrc.cache")
+RC_CACHE_FORMAT = 2
+RC_FUNCTION_HEADER = re.compile(r"^\s*(?:function\s+([A-Za-z_][\w-]*)\s*(?:\(\s*\))?|([A-Za-z_][\w-]*)\s*\(\s*\))\s*\{(.*)$")
+
+# Lines between the spill file offsets the pager remembers
+PAGER_CHECKPOINT = 256
+
+# du worker threads and the cache of directory scans
+DU_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+DU_CACHE_FILE = os.path.join(YASH_HOME, "du-cache.pickle")
+
+# tail: bytes read per step backwards from the end, and follow-mode poll intervals
+TAIL_BLOCK_SIZE = 64 * 1024
+TAIL_POLL_MIN = 0.1
+TAIL_POLL_MAX = 1.0
+
+# Text builtins: wc read size, sort memory budget and merge width
+WC_BUFFER_SIZE = 1024 * 1024
+SORT_MEMORY_LIMIT = 64 * 1024 * 1024
+SORT_MERGE_FANIN = 64
+
+# Entries per directory tree shows before summarizing the rest
+TREE_ENTRY_LIMIT = 100
+
+# hash worker threads, read sizes and the cache of file digests
+HASH_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+HASH_BUFFER_SIZE = 1024 * 1024
+HASH_MMAP_THRESHOLD = 4 * 1024 * 1024
+HASH_CACHE_FILE = os.path.join(YASH_HOME, "hash-cache.pickle")
+HASH_CACHE_MAX_ENTRIES = 20000
+
+# z: frecency database, total rank at which entries are aged, and seconds between saves
+Z_DATA_FILE = os.path.join(YASH_HOME, "z.pickle")
+Z_MAX_RANK = 9000
+Z_SAVE_INTERVAL = 30
+
+# Glob matches per directory beyond which results are streamed unsorted
+GLOB_SORT_LIMIT = 10000
+
+# Self-update settings
+UPDATE_DIR = os.path.join(YASH_HOME, "updates")
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+DOWNLOAD_RETRIES = 3
+
+# Daemon mode: default socket, and seconds a system information report is reused
+DAEMON_SOCKET = os.path.join(YASH_HOME, "yash.sock")
+SYSINFO_TTL = 60
+
+# Seconds a daemon command may take to stop after its client disconnects before it is killed
+DAEMON_KILL_DELAY = 2
+
 def print_color(text, color, end='\n'):
     """Print colored text with optional end parameter"""
     if IS_WINDOWS:
@@ -44,13 +151,255 @@ def print_color(text, color, end='\n'):
     print(f"{color}{text}{Colors.ENDC}", end=end)
 
 def execute_command(command):
-    """Execute a system command and return output"""
+    """Execute a system command (a shell string or an argv list) and return output"""
+    global last_exit_status
     try:
-        result = subprocess.run(command, shell=True, capture_output=True, text=True)
+        result = subprocess.run(command, shell=isinstance(command, str), capture_output=True, text=True)
+        last_exit_status = result.returncode
         return result.stdout if result.returncode == 0 else result.stderr
+    except FileNotFoundError:
+        last_exit_status = 127
+        return ""
     except Exception as e:
+        last_exit_status = 1
         return f"Error executing command: {e}"
 
+def stream_command(command):
+    """Run a system command and yield its output lines as they arrive"""
+    global last_exit_status
+    try:
+        process = subprocess.Popen(command, shell=isinstance(command, str), stdout=subprocess.PIPE,
+                                   stderr=subprocess.STDOUT, text=True, errors="replace", bufsize=1)
+    except FileNotFoundError:
+        last_exit_status = 127
+        return
+    except Exception as e:
+        last_exit_status = 1
+        yield f"Error executing command: {e}"
+        return
+    try:
+        for line in process.stdout:
+            yield line
+    finally:
+        if process.poll() is None:
+            # The reader stopped early (e.g. pager quit): don't leave the command running
+            process.terminate()
+        process.stdout.close()
+        last_exit_status = process.wait()
+
+# Pager for long output
+
+class Pager:
+    """Interactive pager over a stream of lines.
+
+    Lines are read from the stream only as far as the user scrolls and are
+    spilled to a temporary file. Memory holds one screen of lines plus the
+    file offset of every PAGER_CHECKPOINT-th line, so paging through
+    gigabytes of output stays cheap.
+    """
+    def __init__(self, lines, height):
+        self.source = iter(lines)
+        self.height = height
+        self.top = 0
+        self.count = 0
+        self.exhausted = False
+        self.pattern = ""
+        self.message = ""
+        fd, self.spill_path = tempfile.mkstemp(prefix="yash-pager-")
+        self.writer = os.fdopen(fd, "wb")
+        self.reader = open(self.spill_path, "rb")
+        self.write_pos = 0
+        self.checkpoints = array.array("q")
+
+    def _consume(self):
+        """Read one line from the source into the spill file, returning it or None at the end"""
+        try:
+            line = next(self.source).rstrip("\r\n")
+        except StopIteration:
+            self.exhausted = True
+            return None
+        if self.count % PAGER_CHECKPOINT == 0:
+            self.checkpoints.append(self.write_pos)
+        data = line.encode("utf-8", errors="replace") + b"\n"
+        self.writer.write(data)
+        self.write_pos += len(data)
+        self.count += 1
+        return line
+
+    def _fill(self, count):
+        """Consume the source until count lines are available or it ends"""
+        while not self.exhausted and (count is None or self.count < count):
+            self._consume()
+
+    def scan(self, start):
+        """Yield (number, line) from line start onwards, reading further input as needed"""
+        if start < self.count:
+            self.writer.flush()
+            self.reader.seek(self.checkpoints[start // PAGER_CHECKPOINT])
+            number = start - start % PAGER_CHECKPOINT
+            spilled = self.count
+            while number < spilled:
+                line = self.reader.readline()
+                if number >= start:
+                    yield number, line[:-1].decode("utf-8", errors="replace")
+                number += 1
+            start = spilled
+        self._fill(start)
+        while start == self.count:
+            line = self._consume()
+            if line is None:
+                return
+            yield start, line
+            start += 1
+
+    def get_lines(self, start, count):
+        """Return up to count lines starting at line start"""
+        return [line for _, line in itertools.islice(self.scan(start), count)]
+
+    def search(self, forward=True):
+        """Move to the next (or previous) line containing the search pattern"""
+        if not self.pattern:
+            return
+        ignore_case = self.pattern.islower()
+        needle = self.pattern.lower() if ignore_case else self.pattern
+        if forward:
+            for number, line in self.scan(self.top + 1):
+                if needle in (line.lower() if ignore_case else line):
+                    self.top = number
+                    return
+        else:
+            number = self.top
+            while number > 0:
+                start = max(0, number - 16 * PAGER_CHECKPOINT)
+                chunk = self.get_lines(start, number - start)
+                for offset in range(len(chunk) - 1, -1, -1):
+                    line = chunk[offset]
+                    if needle in (line.lower() if ignore_case else line):
+                        self.top = start + offset
+                        return
+                number = start
+        self.message = f"Pattern not found: {self.pattern}"
+
+    def render(self):
+        """Draw the current screen and the status line"""
+        width = shutil.get_terminal_size().columns
+        out = ["\033[H\033[J"]
+        for line in self.get_lines(self.top, self.height):
+            if "\033" not in line:
+                line = line.expandtabs()[:width]
+                if self.pattern and self.pattern in line:
+                    line = line.replace(self.pattern, f"\033[7m{self.pattern}\033[27m")
+            out.append(line + Colors.ENDC + "\n")
+        if self.message:
+            status = self.message
+            self.message = ""
+        else:
+            last = min(self.top + self.height, self.count)
+            status = f"lines {self.top + 1}-{last}" + (f" of {self.count} (END)" if self.exhausted and last >= self.count else "")
+            status += "  [space/b page, j/k line, g/G top/end, /search, n/N next/prev, q quit]"
+        out.append(f"\033[7m{status[:width - 1]}\033[0m")
+        sys.stdout.write("".join(out))
+        sys.stdout.flush()
+
+    def run(self):
+        """Run the interactive key loop until the user quits"""
+        try:
+            while True:
+                self.render()
+                key = read_key()
+                if key in ("q", "Q", "\x03", "\x1b"):
+                    break
+                elif key in (" ", "f", "PGDN"):
+                    self._fill(self.top + 2 * self.height)
+                    self.top = max(0, min(self.top + self.height, self.count - self.height))
+                elif key in ("b", "PGUP"):
+                    self.top = max(0, self.top - self.height)
+                elif key in ("j", "\r", "\n", "DOWN"):
+                    self._fill(self.top + self.height + 1)
+                    self.top = max(0, min(self.top + 1, self.count - self.height))
+                elif key in ("k", "UP"):
+                    self.top = max(0, self.top - 1)
+                elif key == "g":
+                    self.top = 0
+                elif key == "G":
+                    self._fill(None)
+                    self.top = max(0, self.count - self.height)
+                elif key == "/":
+                    sys.stdout.write("\r\033[K/")
+                    sys.stdout.flush()
+                    self.pattern = read_line_raw()
+                    self.search()
+                elif key == "n":
+                    self.search()
+                elif key == "N":
+                    self.search(forward=False)
+        finally:
+            sys.stdout.write("\r\033[K")
+            sys.stdout.flush()
+            self.writer.close()
+            self.reader.close()
+            os.remove(self.spill_path)
+
+def read_key():
+    """Read a single keypress without waiting for Enter"""
+    if IS_WINDOWS:
+        import msvcrt
+        key = msvcrt.getwch()
+        if key in ("\x00", "\xe0"):
+            return {"H": "UP", "P": "DOWN", "I": "PGUP", "Q": "PGDN"}.get(msvcrt.getwch(), "")
+        return key
+
+    import termios
+    import tty
+    fd = sys.stdin.fileno()
+    old_settings = termios.tcgetattr(fd)
+    try:
+        tty.setraw(fd, termios.TCSANOW)  # Keep keys typed ahead
+        key = os.read(fd, 1).decode(errors="replace")
+        if key == "\x1b":
+            # Arrow and page keys arrive as escape sequences
+            import select
+            if select.select([fd], [], [], 0.05)[0]:
+                sequence = os.read(fd, 3).decode(errors="replace")
+                return {"[A": "UP", "[B": "DOWN", "[5~": "PGUP", "[6~": "PGDN"}.get(sequence, "")
+        return key
+    finally:
+        termios.tcsetattr(fd, termios.TCSADRAIN, old_settings)
+
+def read_line_raw():
+    """Read a line of input for the pager's search prompt"""
+    try:
+        return input()
+    except EOFError:
+        return ""
+
+def page_output(lines):
+    """Print lines, switching to the pager when they overflow the screen on a TTY.
+
+    Returns True if anything was printed.
+    """
+    lines = iter(lines)
+    if not (sys.stdout.isatty() and sys.stdin.isatty()):
+        printed = False
+        for line in lines:
+            print(line.rstrip("\r\n"))
+            printed = True
+        return printed
+
+    height = max(1, shutil.get_terminal_size().lines - 1)
+    head = list(itertools.islice(lines, height + 1))
+    if len(head) <= height:
+        for line in head:
+            print(line.rstrip("\r\n"))
+        return bool(head)
+    try:
+        Pager(itertools.chain(head, lines), height).run()
+    finally:
+        close = getattr(lines, "close", None)
+        if close:
+            close()  # Stop a command whose output was not read to the end
+    return True
+
 def install_package(package):
     """Install a package using the appropriate package manager"""
     print_color(f"Installing {package}...", Colors.YELLOW)
@@ -187,7 +536,17 @@ def list_directory(args=[]):
         print_color(f"Error listing directory: {e}", Colors.RED)
 
 def show_system_info():
-    """Display system information"""
+    """Display system information, reusing a recent report"""
+    global sysinfo_snapshot
+    if sysinfo_snapshot is None or time.monotonic() - sysinfo_snapshot[0] > SYSINFO_TTL:
+        # Gathering the details spawns several commands, so keep the rendered text for a while
+        buffer = io.StringIO()
+        with contextlib.redirect_stdout(buffer):
+            _print_system_info()
+        sysinfo_snapshot = (time.monotonic(), buffer.getvalue())
+    sys.stdout.write(sysinfo_snapshot[1])
+
+def _print_system_info():
     print_color("=== System Information ===", Colors.HEADER)
     print(f"System: {platform.system()}")
     print(f"Node: {platform.node()}")
@@ -261,15 +620,526 @@ def echo_command(args):
 
 def cat_command(args):
     """Display file contents"""
+    global last_exit_status
     if not args:
-        print_color("Usage: cat <filename>", Colors.RED)
+        print_color("Usage: cat <filename> [filename...]", Colors.RED)
         return
-        
+
+    for filename in stream_args(args):
+        try:
+            with open(filename, 'r', errors='replace') as file:
+                # Stream in chunks so huge files are never held in memory
+                for chunk in iter(lambda: file.read(64 * 1024), ''):
+                    sys.stdout.write(chunk)
+            print()
+        except Exception as e:
+            last_exit_status = 1
+            print_color(f"Error: {e}", Colors.RED)
+
+def file_lines(paths):
+    """Yield the lines of each file in turn, without line endings"""
+    global last_exit_status
+    for filename in paths:
+        try:
+            with open(filename, 'r', errors='replace') as file:
+                for line in file:
+                    yield line.rstrip("\n")
+        except Exception as e:
+            last_exit_status = 1
+            print_color(f"Error: {e}", Colors.RED)
+
+def cat_lines(args, lines=None):
+    """Yield the lines of the named files, or pass piped input through"""
+    if lines is not None and not args:
+        yield from lines
+        return
+    yield from file_lines(stream_args(args))
+
+def read_last_lines(path, count):
+    """Return the last count lines of a file and its size, reading backwards in blocks"""
+    with open(path, "rb") as file:
+        end = file.seek(0, os.SEEK_END)
+        if count <= 0:
+            return [], end
+        blocks = []
+        newlines = 0
+        position = end
+        # One newline more than needed marks where the first wanted line starts
+        while position > 0 and newlines <= count:
+            step = min(TAIL_BLOCK_SIZE, position)
+            position -= step
+            file.seek(position)
+            block = file.read(step)
+            if not blocks and block.endswith(b"\n"):
+                newlines -= 1  # The final newline does not start a new line
+            newlines += block.count(b"\n")
+            blocks.append(block)
+    data = b"".join(reversed(blocks))
+    if not data:
+        return [], end
+    lines = data.split(b"\n")
+    if data.endswith(b"\n"):
+        lines.pop()
+    return [line.decode("utf-8", errors="replace").rstrip("\r") for line in lines[-count:]], end
+
+class _FollowedFile:
+    """A file being followed by tail -f, reopened when rotated or truncated"""
+    def __init__(self, path, position):
+        self.path = path
+        self.file = None
+        self.identity = None
+        self.partial = b""
+        self._open(position)
+
+    def _open(self, position):
+        try:
+            self.file = open(self.path, "rb")
+        except OSError:
+            self.file = None
+            self.identity = None
+            return
+        stat = os.fstat(self.file.fileno())
+        self.identity = (stat.st_dev, stat.st_ino)
+        self.file.seek(min(position, stat.st_size))
+
+    def _read_new(self):
+        data = self.file.read()
+        if not data:
+            return []
+        data = self.partial + data
+        lines = data.split(b"\n")
+        self.partial = lines.pop()
+        return [line.decode("utf-8", errors="replace").rstrip("\r") for line in lines]
+
+    def poll(self):
+        """Return (new lines, notice) since the last poll"""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return [], None
+        if self.file is None:
+            self._open(0)
+            return (self._read_new(), f"{self.path} has appeared; following new file") if self.file else ([], None)
+        if (stat.st_dev, stat.st_ino) != self.identity:
+            # Rotated: finish the old file, then follow the new one from its start
+            lines = self._read_new()
+            self.file.close()
+            self.partial = b""
+            self._open(0)
+            return lines + (self._read_new() if self.file else []), f"{self.path} has been replaced; following new file"
+        if stat.st_size < self.file.tell():
+            self.file.seek(0)
+            self.partial = b""
+            return self._read_new(), f"{self.path}: file truncated"
+        if stat.st_size > self.file.tell():
+            return self._read_new(), None
+        return [], None
+
+    def close(self):
+        if self.file:
+            self.file.close()
+
+def tail_lines(args, lines=None):
+    """Yield the last lines of files or piped input, optionally following files"""
+    global last_exit_status
+    count = 10
+    follow = False
+    paths = []
+    args = list(args)
+    i = 0
     try:
-        with open(args[0], 'r') as file:
-            print(file.read())
-    except Exception as e:
+        while i < len(args):
+            if args[i] == "-n":
+                count = int(args[i + 1])
+                i += 1
+            elif args[i] in ("-f", "-F", "--follow"):
+                follow = True
+            elif re.fullmatch(r"-\d+", args[i]):
+                count = int(args[i][1:])
+            else:
+                paths.append(args[i])
+            i += 1
+    except (IndexError, ValueError):
+        last_exit_status = 1
+        print_color("Usage: tail [-n N] [-f] <filename> [filename...]", Colors.RED)
+        return
+
+    if not paths:
+        if lines is None:
+            last_exit_status = 1
+            print_color("Usage: tail [-n N] [-f] <filename> [filename...]", Colors.RED)
+            return
+        yield from collections.deque(lines, maxlen=count)
+        return
+
+    followed = []
+    for path in paths:
+        if len(paths) > 1:
+            yield f"{Colors.HEADER}==> {path} <=={Colors.ENDC}"
+        try:
+            last, size = read_last_lines(path, count)
+        except OSError as e:
+            last_exit_status = 1
+            print_color(f"tail: {e}", Colors.RED)
+            last, size = [], 0
+        yield from last
+        followed.append(_FollowedFile(path, size))
+
+    if not follow:
+        for followed_file in followed:
+            followed_file.close()
+        return
+
+    current = followed[-1]
+    interval = TAIL_POLL_MIN
+    try:
+        while True:
+            got_lines = False
+            for followed_file in followed:
+                new_lines, notice = followed_file.poll()
+                if notice:
+                    yield f"{Colors.YELLOW}tail: {notice}{Colors.ENDC}"
+                if not new_lines:
+                    continue
+                got_lines = True
+                if len(followed) > 1 and followed_file is not current:
+                    current = followed_file
+                    yield f"{Colors.HEADER}==> {followed_file.path} <=={Colors.ENDC}"
+                yield from new_lines
+            # Poll quickly while lines arrive, back off while the files are idle
+            interval = TAIL_POLL_MIN if got_lines else min(interval * 2, TAIL_POLL_MAX)
+            time.sleep(interval)
+    finally:
+        for followed_file in followed:
+            followed_file.close()
+
+def tail_command(args):
+    """Show the end of files, following them with -f"""
+    try:
+        for line in tail_lines(args):
+            print(line, flush=True)
+    except KeyboardInterrupt:
+        print()
+
+# Streaming text-processing builtins
+
+def parse_options(args, flags="", valued="", long_flags=()):
+    """Parse leading short options such as -rn, -k 2 or -k2.
+
+    Returns (options, index of the first operand). Unknown options raise
+    ValueError. A bare -N is taken as -n N when n takes a value, and names
+    in long_flags (like "--no-cache") are stored as boolean options.
+    """
+    options = {}
+    index = 0
+    while has_args(args, index + 1):
+        arg = args[index]
+        if arg == "--":
+            index += 1
+            break
+        if arg in long_flags:
+            options[arg] = True
+            index += 1
+            continue
+        if not arg.startswith("-") or arg == "-":
+            break
+        if "n" in valued and re.fullmatch(r"-\d+", arg):
+            options["n"] = arg[1:]
+            index += 1
+            continue
+        position = 1
+        while position < len(arg):
+            flag = arg[position]
+            if flag in flags:
+                options[flag] = True
+                position += 1
+            elif flag in valued:
+                if position + 1 < len(arg):
+                    options[flag] = arg[position + 1:]
+                elif has_args(args, index + 2):
+                    index += 1
+                    options[flag] = args[index]
+                else:
+                    raise ValueError(f"option -{flag} needs a value")
+                break
+            else:
+                raise ValueError(f"unknown option -{flag}")
+        index += 1
+    return options, index
+
+def parse_size(text):
+    """Parse a size such as 512K, 64M or 2G into bytes"""
+    match = re.fullmatch(r"(\d+)([KMGT]?)B?", text.strip().upper())
+    if not match:
+        raise ValueError(f"invalid size: {text}")
+    return int(match.group(1)) * 1024 ** " KMGT".index(match.group(2) or " ")
+
+def _input_lines(args, index, lines):
+    """Piped lines if there are no file operands, otherwise the files' lines"""
+    if lines is not None and not has_args(args, index + 1):
+        return lines
+    return file_lines(stream_args(args, index))
+
+def head_lines(args, lines=None):
+    """Yield the first lines of files or piped input"""
+    options, index = parse_options(args, valued="n")
+    count = int(options.get("n", 10))
+    if lines is not None and not has_args(args, index + 1):
+        yield from itertools.islice(lines, count)
+        return
+    paths = list(stream_args(args, index))
+    for path in paths:
+        if len(paths) > 1:
+            yield f"{Colors.HEADER}==> {path} <=={Colors.ENDC}"
+        yield from itertools.islice(file_lines([path]), count)
+
+def count_file(path, count_words):
+    """Count (lines, words, bytes) of a file with large binary reads"""
+    line_count = word_count = byte_count = 0
+    in_word = False
+    with open(path, "rb") as file:
+        while True:
+            chunk = file.read(WC_BUFFER_SIZE)
+            if not chunk:
+                break
+            byte_count += len(chunk)
+            line_count += chunk.count(b"\n")
+            if count_words:
+                word_count += len(chunk.split())
+                # A word cut in two by the buffer boundary was counted twice
+                if in_word and not chunk[:1].isspace():
+                    word_count -= 1
+                in_word = not chunk[-1:].isspace()
+    return line_count, word_count, byte_count
+
+def wc_lines(args, lines=None):
+    """Yield line, word and byte counts for files or piped input"""
+    global last_exit_status
+    options, index = parse_options(args, flags="lwc")
+    shown = [flag for flag in "lwc" if flag in options] or ["l", "w", "c"]
+
+    def format_counts(counts, name):
+        values = dict(zip("lwc", counts))
+        return "".join(f"{values[flag]:>8}" for flag in shown) + (f" {name}" if name else "")
+
+    if lines is not None and not has_args(args, index + 1):
+        line_count = word_count = byte_count = 0
+        for line in lines:
+            line_count += 1
+            if "w" in shown:
+                word_count += len(line.split())
+            if "c" in shown:
+                byte_count += len(line.encode("utf-8", errors="replace")) + 1
+        yield format_counts((line_count, word_count, byte_count), "")
+        return
+
+    totals = [0, 0, 0]
+    files = 0
+    for path in stream_args(args, index):
+        try:
+            counts = count_file(path, "w" in shown)
+        except OSError as e:
+            last_exit_status = 1
+            print_color(f"wc: {e}", Colors.RED)
+            continue
+        files += 1
+        totals = [a + b for a, b in zip(totals, counts)]
+        yield format_counts(counts, path)
+    if files > 1:
+        yield format_counts(totals, "total")
+
+_SORT_NUMBER = re.compile(r"[ \t]*(-?(?:\d+\.?\d*|\.\d+))")
+_SORT_FIELD = re.compile(r"[ \t]*[^ \t]+")
+
+def _parse_key_position(position):
+    """Parse a sort -k position F[.C] into (field, char); char is 0 when not given"""
+    field, _, char = position.partition(".")
+    field, char = int(field), int(char or 0)
+    if field < 1 or char < 0:
+        raise ValueError(f"invalid key position: {position}")
+    return field, char
+
+def _sort_key(numeric, fold, key_spec, separator):
+    """Build the key function for sort options.
+
+    key_spec is a -k value POS1[,POS2] where POS is F[.C]: the key runs
+    from field POS1 to the end of field POS2, or to the end of the line.
+    Without -t, a field includes the blanks before it, as in GNU sort.
+    """
+    start_field = end_field = None
+    if key_spec:
+        start, _, end = key_spec.partition(",")
+        start_field, start_char = _parse_key_position(start)
+        if end:
+            end_field, end_char = _parse_key_position(end)
+
+    def key(line):
+        value = line
+        if start_field:
+            if separator:
+                fields = []
+                position = 0
+                for part in line.split(separator):
+                    fields.append((position, position + len(part)))
+                    position += len(part) + len(separator)
+            else:
+                fields = [match.span() for match in _SORT_FIELD.finditer(line)]
+            if start_field > len(fields):
+                value = ""
+            else:
+                field_start, field_end = fields[start_field - 1]
+                begin = min(field_start + max(start_char - 1, 0), field_end)
+                finish = len(line)
+                if end_field and end_field <= len(fields):
+                    field_start, field_end = fields[end_field - 1]
+                    finish = min(field_start + end_char, field_end) if end_char else field_end
+                value = line[begin:finish]
+        if numeric:
+            match = _SORT_NUMBER.match(value)
+            return float(match.group(1)) if match else 0.0
+        return value.upper() if fold else value
+    return key
+
+def _spill_run(lines):
+    """Write a sorted run to a temporary file and rewind it"""
+    # newline="\n": read lines back exactly as written, keeping any \r
+    run_file = tempfile.TemporaryFile(mode="w+", encoding="utf-8", errors="surrogatepass", newline="\n")
+    for line in lines:
+        run_file.write(line)
+        run_file.write("\n")
+    run_file.seek(0)
+    return run_file
+
+def _read_run(run_file):
+    for line in run_file:
+        yield line[:-1]
+
+def external_sort(lines, key=None, reverse=False, memory_limit=SORT_MEMORY_LIMIT):
+    """Sort lines within a memory budget.
+
+    Lines are collected until they reach memory_limit, sorted and spilled
+    to a temporary file as a run. The runs are then k-way merged with
+    heapq.merge, at most SORT_MERGE_FANIN files at a time.
+    """
+    runs = []
+    batch = []
+    batch_bytes = 0
+    for line in lines:
+        batch.append(line)
+        batch_bytes += sys.getsizeof(line) + 8
+        if batch_bytes >= memory_limit:
+            batch.sort(key=key, reverse=reverse)
+            runs.append(_spill_run(batch))
+            batch = []
+            batch_bytes = 0
+    batch.sort(key=key, reverse=reverse)
+
+    try:
+        # Too many runs to keep open at once: merge them in groups first
+        while len(runs) > SORT_MERGE_FANIN:
+            group, runs = runs[:SORT_MERGE_FANIN], runs[SORT_MERGE_FANIN:]
+            runs.append(_spill_run(heapq.merge(*map(_read_run, group), key=key, reverse=reverse)))
+            for run_file in group:
+                run_file.close()
+        yield from heapq.merge(batch, *map(_read_run, runs), key=key, reverse=reverse)
+    finally:
+        for run_file in runs:
+            run_file.close()
+
+def sort_lines(args, lines=None):
+    """Yield the sorted lines of files or piped input"""
+    options, index = parse_options(args, flags="rnufs", valued="ktS")
+    key = _sort_key("n" in options, "f" in options, options.get("k"), options.get("t"))
+    memory_limit = parse_size(options["S"]) if "S" in options else SORT_MEMORY_LIMIT
+    if "s" in options or "u" in options:
+        sort_key = key
+    else:
+        # Lines with equal keys fall back to comparing the whole line, as GNU sort does
+        def sort_key(line):
+            return key(line), line
+    sorted_lines = external_sort(_input_lines(args, index, lines), sort_key, "r" in options, memory_limit)
+    if "u" not in options:
+        yield from sorted_lines
+        return
+    previous = object()
+    for line in sorted_lines:
+        current = key(line)
+        if current != previous:
+            yield line
+            previous = current
+
+def uniq_lines(args, lines=None):
+    """Collapse adjacent duplicate lines of a file or piped input"""
+    options, index = parse_options(args, flags="cdui")
+    fold = "i" in options
+    previous = None
+    previous_key = None
+    count = 0
+
+    def emit():
+        if ("d" in options and count < 2) or ("u" in options and count > 1):
+            return None
+        return f"{count:>7} {previous}" if "c" in options else previous
+
+    for line in _input_lines(args, index, lines):
+        line_key = line.lower() if fold else line
+        if count and line_key == previous_key:
+            count += 1
+            continue
+        if count:
+            output = emit()
+            if output is not None:
+                yield output
+        previous, previous_key, count = line, line_key, 1
+    if count:
+        output = emit()
+        if output is not None:
+            yield output
+
+def _parse_ranges(spec):
+    """Parse a cut list such as 1,3-5,7- into (start, end) pairs, 1-based and inclusive"""
+    ranges = []
+    for part in spec.split(","):
+        start, dash, end = part.partition("-")
+        first = int(start) if start else 1
+        last = (int(end) if end else sys.maxsize) if dash else first
+        if first < 1 or last < first:
+            raise ValueError(f"invalid range: {part}")
+        ranges.append((first, last))
+    return ranges
+
+def cut_lines(args, lines=None):
+    """Select fields (-f, split on -d) or characters (-c) from each line"""
+    options, index = parse_options(args, flags="s", valued="dfc")
+    if ("f" in options) == ("c" in options):
+        raise ValueError("specify exactly one of -f or -c")
+    ranges = _parse_ranges(options.get("f") or options.get("c"))
+
+    @functools.lru_cache(maxsize=1024)
+    def selected(count):
+        return [i for i in range(count) if any(first <= i + 1 <= last for first, last in ranges)]
+
+    delimiter = options.get("d", "\t")
+    for line in _input_lines(args, index, lines):
+        if "c" in options:
+            yield "".join(line[i] for i in selected(len(line)))
+        elif delimiter in line:
+            fields = line.split(delimiter)
+            yield delimiter.join(fields[i] for i in selected(len(fields)))
+        elif "s" not in options:
+            yield line  # Like cut, lines without the delimiter pass through
+
+def filter_command(filter_function, args):
+    """Run a line filter as a standalone command and print its output"""
+    global last_exit_status
+    try:
+        for line in filter_function(args):
+            print(line)
+    except ValueError as e:
+        last_exit_status = 1
         print_color(f"Error: {e}", Colors.RED)
+    except KeyboardInterrupt:
+        print()
 
 def type_command(args):
     """Windows equivalent of cat"""
@@ -300,9 +1170,229 @@ def cd_command(args):
             os.chdir(os.path.expanduser("~"))
         else:
             os.chdir(args[0])
+            directory_store.add(os.getcwd())
     except Exception as e:
         print_color(f"Error: {e}", Colors.RED)
 
+def _trigrams(text):
+    """Return the set of lowercase three-character substrings of text"""
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+class DirectoryStore:
+    """Frecency database of visited directories for z.
+
+    Each directory gets an integer id indexing the parallel ranks and times
+    arrays. A trigram index maps every lowercase three-character substring
+    to the sorted array of ids whose path contains it, so a query only
+    scores the paths that can match. The index is saved with the data, so
+    nothing is rebuilt at startup. When the ranks sum past Z_MAX_RANK every
+    rank is aged by 1% and entries below 1 are forgotten, which bounds the
+    size; directories that no longer exist are dropped when a query reaches
+    them.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.paths = None
+        self.ids = {}
+        self.ranks = array.array("d")
+        self.times = array.array("d")
+        self.index = {}
+        self.total = 0.0
+        self.dead = 0
+        self.dirty = False
+        self.saved_at = 0.0
+
+    def _load(self):
+        if self.paths is not None:
+            return
+        data = _load_pickle(self.path)
+        try:
+            self.paths = data["paths"]
+            self.ranks = data["ranks"]
+            self.times = data["times"]
+            self.index = data["index"]
+        except (KeyError, TypeError):
+            self.paths = []
+        self.ids = {path: i for i, path in enumerate(self.paths) if path is not None}
+        self.dead = len(self.paths) - len(self.ids)
+        self.total = sum(self.ranks)
+        self.saved_at = time.monotonic()
+        atexit.register(self.save)
+
+    def _rebuild(self):
+        """Drop forgotten entries and renumber the rest, remapping the index"""
+        remap = array.array("q", [-1]) * len(self.paths)
+        paths = []
+        ranks = array.array("d")
+        times = array.array("d")
+        for i, path in enumerate(self.paths):
+            if path is not None:
+                remap[i] = len(paths)
+                paths.append(path)
+                ranks.append(self.ranks[i])
+                times.append(self.times[i])
+        index = {}
+        for trigram, ids in self.index.items():
+            kept = array.array("I", (remap[i] for i in ids if remap[i] >= 0))
+            if kept:
+                index[trigram] = kept
+        self.paths, self.ranks, self.times, self.index = paths, ranks, times, index
+        self.ids = {path: i for i, path in enumerate(paths)}
+        self.dead = 0
+
+    def _forget(self, i):
+        del self.ids[self.paths[i]]
+        self.paths[i] = None
+        self.total -= self.ranks[i]
+        self.ranks[i] = 0.0
+        self.dead += 1
+        self.dirty = True
+
+    def add(self, directory):
+        """Record a visit to directory"""
+        self._load()
+        if directory == os.path.expanduser("~"):
+            return
+        i = self.ids.get(directory)
+        if i is None:
+            i = self.ids[directory] = len(self.paths)
+            self.paths.append(directory)
+            self.ranks.append(1.0)
+            self.times.append(time.time())
+            for trigram in _trigrams(directory):
+                self.index.setdefault(trigram, array.array("I")).append(i)
+        else:
+            self.ranks[i] += 1
+            self.times[i] = time.time()
+        self.total += 1
+        self.dirty = True
+
+        if self.total > Z_MAX_RANK:
+            self.total *= 0.99
+            for i, rank in enumerate(self.ranks):
+                if rank:
+                    self.ranks[i] = rank * 0.99
+                    if self.ranks[i] < 1:
+                        self._forget(i)
+        if self.dead > len(self.paths) // 4:
+            self._rebuild()
+        if time.monotonic() - self.saved_at > Z_SAVE_INTERVAL:
+            self.save()
+
+    def save(self):
+        """Write the database if it changed since the last save"""
+        if self.dirty:
+            _save_pickle(self.path, {"paths": self.paths, "ranks": self.ranks,
+                                     "times": self.times, "index": self.index})
+            self.dirty = False
+        self.saved_at = time.monotonic()
+
+    def _candidates(self, fragments):
+        """Return ids that may match: those holding the rarest trigrams of the fragments.
+
+        Intersection stops once the remaining postings are much longer than
+        the candidate set; the pattern match filters the few left over.
+        """
+        postings = []
+        for fragment in fragments:
+            for trigram in _trigrams(fragment):
+                ids = self.index.get(trigram)
+                if not ids:
+                    return ()
+                postings.append(ids)
+        if not postings:
+            return range(len(self.paths))
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for ids in postings[1:]:
+            if not candidates or len(ids) > 16 * len(candidates):
+                break
+            candidates.intersection_update(ids)
+        return candidates
+
+    def matches(self, fragments):
+        """Return [(score, path)] for paths matching the fragments in order, best first.
+
+        Matching is case-insensitive unless a fragment has capitals. Scores
+        weight the rank by how recently the directory was visited.
+        """
+        self._load()
+        flags = 0 if any(f != f.lower() for f in fragments) else re.IGNORECASE
+        search = re.compile(".*".join(re.escape(f) for f in fragments), flags).search
+        now = time.time()
+        paths, ranks, times = self.paths, self.ranks, self.times
+        scored = []
+        for i in self._candidates(fragments):
+            path = paths[i]
+            if path is None or not search(path):
+                continue
+            age = now - times[i]
+            if age < 3600:
+                weight = 4
+            elif age < 86400:
+                weight = 2
+            elif age < 604800:
+                weight = 0.5
+            else:
+                weight = 0.25
+            scored.append((ranks[i] * weight, path))
+        scored.sort(reverse=True)
+        return scored
+
+    def prune(self, path):
+        """Forget path if it is no longer a directory, returning whether it was forgotten"""
+        if os.path.isdir(path):
+            return False
+        i = self.ids.get(path)
+        if i is not None:
+            self._forget(i)
+        return True
+
+# Directories visited with cd, ranked for z
+directory_store = DirectoryStore(Z_DATA_FILE)
+
+def z_command(args):
+    """Jump to the highest ranked visited directory matching the fragments"""
+    global last_exit_status
+    try:
+        options, index = parse_options(args, flags="l")
+    except ValueError as e:
+        last_exit_status = 1
+        print_color(f"Error: {e}", Colors.RED)
+        print_color("Usage: z [-l] <fragment...>", Colors.RED)
+        return
+    fragments = list(stream_args(args, index))
+
+    if fragments and "l" not in options and os.path.isdir(fragments[-1]):
+        # An existing directory is used directly, like cd
+        cd_command(fragments[-1:])
+        return
+
+    matches = directory_store.matches(fragments)
+    if "l" in options or not fragments:
+        listing = [(score, path) for score, path in reversed(matches) if not directory_store.prune(path)]
+        if not listing:
+            last_exit_status = 1
+            return
+        for score, path in listing:
+            print(f"{score:<10.4g} {path}")
+        return
+
+    for _, path in matches:
+        if directory_store.prune(path):
+            continue
+        try:
+            os.chdir(path)
+        except OSError as e:
+            last_exit_status = 1
+            print_color(f"Error: {e}", Colors.RED)
+            return
+        directory_store.add(path)
+        return
+    last_exit_status = 1
+    print_color(f"z: no match for {' '.join(fragments)}", Colors.RED)
+
 def mkdir_command(args):
     """Create directory"""
     if not args:
@@ -323,23 +1413,37 @@ def whoami_command():
     """Display current user"""
     print(getpass.getuser())
 
-def grep_command(args):
-    """Simple grep implementation"""
-    if len(args) < 2:
-        print_color("Usage: grep <pattern> <filename>", Colors.RED)
+def grep_lines(args, lines=None):
+    """Yield matching lines, from the named files or from piped input lines"""
+    global last_exit_status
+    if not args or (lines is None and not has_args(args, 2)):
+        print_color("Usage: grep <pattern> <filename> [filename...]", Colors.RED)
         return
         
     pattern = args[0]
-    filename = args[1]
-    
-    try:
-        with open(filename, 'r') as file:
-            for line_num, line in enumerate(file, 1):
-                if pattern in line:
-                    highlighted = line.replace(pattern, f"{Colors.RED}{pattern}{Colors.ENDC}")
-                    print(f"{line_num}: {highlighted}", end="")
-    except Exception as e:
-        print_color(f"Error: {e}", Colors.RED)
+    highlight = f"{Colors.RED}{pattern}{Colors.ENDC}"
+    if lines is not None:
+        for line in lines:
+            if pattern in line:
+                yield line.replace(pattern, highlight)
+        return
+
+    show_names = has_args(args, 3)
+    for filename in stream_args(args, 1):
+        prefix = f"{Colors.CYAN}{filename}{Colors.ENDC}:" if show_names else ""
+        try:
+            with open(filename, 'r', errors='replace') as file:
+                for line_num, line in enumerate(file, 1):
+                    if pattern in line:
+                        yield f"{prefix}{line_num}: {line.rstrip(chr(10)).replace(pattern, highlight)}"
+        except Exception as e:
+            last_exit_status = 1
+            print_color(f"Error: {e}", Colors.RED)
+
+def grep_command(args):
+    """Simple grep implementation"""
+    for line in grep_lines(args):
+        print(line)
 
 def findstr_command(args):
     """Windows equivalent of grep"""
@@ -348,21 +1452,18 @@ def findstr_command(args):
 def ps_command():
     """List processes"""
     if IS_WINDOWS:
-        result = execute_command("tasklist | findstr /v \"Image Name PID Session\"")
-        lines = result.split('\n')
-        print_color("PROCESS NAME                 PID     MEMORY", Colors.HEADER)
-        for line in lines[:15]:  # Show only first 15 for brevity
-            if line.strip():
+        def process_lines():
+            yield f"{Colors.HEADER}PROCESS NAME                 PID     MEMORY{Colors.ENDC}"
+            for line in stream_command("tasklist /fo table /nh"):
                 parts = line.split()
                 if len(parts) >= 2:
                     proc_name = parts[0]
                     pid = parts[1]
                     mem = parts[4] if len(parts) > 4 else "N/A"
-                    print(f"{proc_name:<30} {pid:<8} {mem}")
-        print_color(f"... showing 15 of {len(lines)} processes", Colors.YELLOW)
+                    yield f"{proc_name:<30} {pid:<8} {mem}"
+        page_output(process_lines())
     else:
-        result = execute_command("ps aux | head -16")
-        print(result)
+        page_output(stream_command("ps aux"))
 
 def ipconfig_command():
     """Show network configuration"""
@@ -385,10 +1486,9 @@ def ping_command(args):
 def netstat_command():
     """Show network statistics"""
     if IS_WINDOWS:
-        result = execute_command("netstat -an | findstr ESTABLISHED")
+        page_output(stream_command("netstat -an | findstr ESTABLISHED"))
     else:
-        result = execute_command("netstat -tunlp 2>/dev/null || ss -tunlp")
-    print(result)
+        page_output(stream_command("netstat -tunlp 2>/dev/null || ss -tunlp"))
 
 def df_command():
     """Show disk usage"""
@@ -398,95 +1498,708 @@ def df_command():
         result = execute_command("df -h")
     print(result)
 
-def top_command():
-    """Show top processes"""
-    print_color("Press Ctrl+C to exit top view", Colors.YELLOW)
-    time.sleep(1)
-    if IS_WINDOWS:
-        os.system("tasklist /v | sort /R /+58")
-    else:
-        os.system("top -n 1 -b")
-
-def find_command(args):
-    """Find files"""
-    if len(args) < 1:
-        print_color("Usage: find <pattern>", Colors.RED)
-        return
-        
-    pattern = args[0]
-    path = "." if len(args) < 2 else args[1]
-    
-    if IS_WINDOWS:
-        result = execute_command(f"dir /s /b \"{path}\" | findstr \"{pattern}\"")
-    else:
-        result = execute_command(f"find \"{path}\" -name \"*{pattern}*\" 2>/dev/null")
-    
-    if result.strip():
-        print(result)
-    else:
-        print_color(f"No files matching '{pattern}' found.", Colors.YELLOW)
+def format_size(size):
+    """Format a byte count for humans"""
+    for unit in ["B", "K", "M", "G", "T"]:
+        if size < 1024 or unit == "T":
+            return f"{size:.0f}{unit}" if unit == "B" else f"{size:.1f}{unit}"
+        size /= 1024
 
-def tree_command(args):
-    """Show directory tree"""
-    path = "." if not args else args[0]
-    depth = "2" if len(args) < 2 else args[1]
-    
-    if IS_WINDOWS:
-        print_color("Directory Tree:", Colors.HEADER)
-        os.system(f"tree /f /a \"{path}\"")
-    else:
-        # Check if tree command exists
-        if execute_command("which tree").strip():
-            os.system(f"tree -L {depth} \"{path}\"")
-        else:
-            print_color("Tree command not found. Using find as alternative:", Colors.YELLOW)
-            os.system(f"find \"{path}\" -type d | sort | sed 's/[^/]*\\//│   /g'")
+def _du_scan(path, cached):
+    """Scan one directory for du.
 
-def color_test():
-    """Show a color test pattern"""
-    print_color("=== Color Test ===", Colors.HEADER)
-    print_color("This is HEADER text", Colors.HEADER)
-    print_color("This is BLUE text", Colors.BLUE)
-    print_color("This is CYAN text", Colors.CYAN)
-    print_color("This is GREEN text", Colors.GREEN)
-    print_color("This is YELLOW text", Colors.YELLOW)
-    print_color("This is RED text", Colors.RED)
-    print_color("This is BOLD text", Colors.BOLD)
-    print_color("This is UNDERLINE text", Colors.UNDERLINE)
-    print_color("=================", Colors.HEADER)
+    Returns (mtime_ns, own_bytes, subdir_names, linked_files). Files with
+    several hard links are returned as (dev, inode, bytes) and left out of
+    own_bytes so they can be counted once across the whole walk. A cached
+    entry is reused as-is when the directory's mtime has not changed.
+    """
+    dir_stat = os.lstat(path)
+    mtime_ns = dir_stat.st_mtime_ns
+    if cached and cached[0] == mtime_ns:
+        return cached
 
-# New functions for the update
+    # The directory itself takes up space too
+    own_bytes = dir_stat.st_blocks * 512 if hasattr(dir_stat, "st_blocks") else 0
+    subdirs = []
+    linked = []
+    with os.scandir(path) as it:
+        for entry in it:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.name)
+                    continue
+                stat = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            size = stat.st_blocks * 512 if hasattr(stat, "st_blocks") else stat.st_size
+            if stat.st_nlink > 1:
+                linked.append((stat.st_dev, stat.st_ino, size))
+            else:
+                own_bytes += size
+    return mtime_ns, own_bytes, tuple(subdirs), tuple(linked)
 
-def progress_bar(iteration, total, prefix='', suffix='', length=50, fill='█'):
-    """Display a progress bar"""
-    percent = ("{0:.1f}").format(100 * (iteration / float(total)))
-    filled_length = int(length * iteration // total)
-    bar = fill * filled_length + '░' * (length - filled_length)
-    print(f'\r{prefix} [{Colors.GREEN}{bar}{Colors.ENDC}] {percent}% {suffix}', end='\r')
-    if iteration == total: 
-        print()
+def _load_pickle(path):
+    """Load a pickled cache, or an empty dict if it is missing or unreadable"""
+    try:
+        with open(path, "rb") as cache_file:
+            return pickle.load(cache_file)
+    except Exception:
+        return {}
 
-def copy_to_clipboard(text):
-    """Copy text to clipboard based on OS"""
+def _save_pickle(path, cache):
+    """Atomically write a pickled cache"""
     try:
-        if IS_WINDOWS:
-            subprocess.run('clip', input=text.encode('utf-8'), check=True)
-        elif IS_MACOS:
-            subprocess.run('pbcopy', input=text.encode('utf-8'), check=True)
-        elif IS_LINUX:
-            subprocess.run(['xclip', '-selection', 'clipboard'], input=text.encode('utf-8'), check=True)
-        print_color("Text copied to clipboard successfully", Colors.GREEN)
-    except Exception as e:
-        print_color(f"Failed to copy to clipboard: {e}", Colors.RED)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".tmp", "wb") as cache_file:
+            pickle.dump(cache, cache_file, pickle.HIGHEST_PROTOCOL)
+        os.replace(path + ".tmp", path)
+    except OSError as e:
+        print_color(f"Could not save cache {path}: {e}", Colors.YELLOW)
 
-def clipboard_command(args):
-    """Handle clipboard operations"""
-    if not args or args[0] not in ['copy', 'paste']:
-        print_color("Usage: clipboard copy <text> OR clipboard paste", Colors.RED)
-        return
-        
-    if args[0] == 'copy' and len(args) > 1:
-        copy_to_clipboard(' '.join(args[1:]))
+def disk_usage(root, cache, report, progress=None):
+    """Compute the size of every directory under root on a thread pool.
+
+    report(path, total, depth) is called for each directory as soon as its
+    whole subtree is summed (children before parents). cache maps directory
+    paths to _du_scan results and is updated in place; directories whose
+    mtime is unchanged are not rescanned. Returns the total for root.
+    """
+    seen_inodes = set()
+    # path -> [parent, depth, total, unfinished children]
+    nodes = {root: [None, 0, 0, None]}
+    scanned = 0
+
+    def finish(path):
+        while path is not None:
+            parent, depth, total, _ = nodes.pop(path)
+            report(path, total, depth)
+            if parent is None:
+                return total
+            parent_node = nodes[parent]
+            parent_node[2] += total
+            parent_node[3] -= 1
+            if parent_node[3]:
+                return None
+            path = parent
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=DU_WORKERS) as executor:
+        pending = {executor.submit(_du_scan, root, cache.get(root)): root}
+        root_total = 0
+        while pending:
+            done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                path = pending.pop(future)
+                try:
+                    result = future.result()
+                    cache[path] = result
+                except OSError as e:
+                    print_color(f"du: {e}", Colors.RED)
+                    result = (0, 0, (), ())
+                    cache.pop(path, None)
+
+                _, own_bytes, subdirs, linked = result
+                for dev, inode, size in linked:
+                    if (dev, inode) not in seen_inodes:
+                        seen_inodes.add((dev, inode))
+                        own_bytes += size
+
+                node = nodes[path]
+                node[2] += own_bytes
+                node[3] = len(subdirs)
+                scanned += 1
+                if progress:
+                    progress(scanned)
+                for name in subdirs:
+                    child = os.path.join(path, name)
+                    nodes[child] = [path, node[1] + 1, 0, None]
+                    pending[executor.submit(_du_scan, child, cache.get(child))] = child
+                if not subdirs:
+                    total = finish(path)
+                    if total is not None:
+                        root_total = total
+    return root_total
+
+def du_command(args):
+    """Show disk usage of directories"""
+    global last_exit_status
+    max_depth = 1
+    top_count = 0
+    use_cache = False
+    paths = []
+    args = list(args)
+    i = 0
+    try:
+        while i < len(args):
+            if args[i] in ("-d", "--max-depth"):
+                max_depth = int(args[i + 1])
+                i += 1
+            elif args[i] == "-s":
+                max_depth = 0
+            elif args[i] in ("-n", "--top"):
+                top_count = int(args[i + 1])
+                i += 1
+            elif args[i] == "--cache":
+                # Faster repeat runs, but files resized in place do not change their
+                # directory's mtime, so their new size is missed
+                use_cache = True
+            elif args[i] == "--no-cache":
+                use_cache = False
+            else:
+                paths.append(args[i])
+            i += 1
+    except (IndexError, ValueError):
+        last_exit_status = 1
+        print_color("Usage: du [-s] [-d depth] [-n N] [--cache] [path...]", Colors.RED)
+        print_color("  --cache reuses scans of directories whose mtime is unchanged; files grown or truncated in place are missed", Colors.RED)
+        return
+
+    cache = _load_pickle(DU_CACHE_FILE) if use_cache else {}
+    show_progress = sys.stdout.isatty()
+    largest = []
+    last_progress = [0.0]
+
+    def progress(scanned):
+        now = time.monotonic()
+        if now - last_progress[0] > 0.2:
+            last_progress[0] = now
+            print(f"\r{Colors.CYAN}Scanning... {scanned} directories{Colors.ENDC}\033[K", end="", flush=True)
+
+    def report(path, total, depth):
+        if top_count:
+            # Keep the N largest directories in a min-heap
+            if len(largest) < top_count:
+                heapq.heappush(largest, (total, path))
+            elif total > largest[0][0]:
+                heapq.heapreplace(largest, (total, path))
+        if depth <= max_depth and not top_count:
+            if show_progress:
+                print("\r\033[K", end="")
+            print(f"{format_size(total):>8}  {path}")
+
+    for path in paths or ["."]:
+        if not os.path.isdir(path):
+            last_exit_status = 1
+            print_color(f"du: '{path}' is not a directory", Colors.RED)
+            continue
+        root = os.path.abspath(path) if use_cache else path
+        try:
+            disk_usage(root, cache, report, progress if show_progress else None)
+        except KeyboardInterrupt:
+            print_color("\ndu interrupted", Colors.YELLOW)
+            return
+        if show_progress:
+            print("\r\033[K", end="")
+        if use_cache:
+            # Forget directories below root that no longer exist
+            prefix = root.rstrip(os.sep) + os.sep
+            stale = [key for key in cache if key.startswith(prefix)]
+            for key in stale:
+                if not os.path.isdir(key):
+                    del cache[key]
+
+    if top_count:
+        print_color(f"Largest {len(largest)} directories:", Colors.HEADER)
+        for total, path in sorted(largest, reverse=True):
+            print(f"{format_size(total):>8}  {path}")
+    if use_cache:
+        _save_pickle(DU_CACHE_FILE, cache)
+
+# File hashing
+
+HASH_ALGORITHMS = {
+    "sha256": hashlib.sha256,
+    "sha1": hashlib.sha1,
+    "md5": hashlib.md5,
+    "blake2": hashlib.blake2b,
+    "blake2b": hashlib.blake2b,
+    "blake2s": hashlib.blake2s,
+}
+
+# Which algorithm a manifest digest of this many hex digits came from
+HASH_LENGTHS = {64: "sha256", 40: "sha1", 32: "md5", 128: "blake2b"}
+
+def hash_file(path, algorithm):
+    """Hash a file, through mmap when it is large"""
+    digest = HASH_ALGORITHMS[algorithm]()
+    with open(path, "rb") as file:
+        size = os.fstat(file.fileno()).st_size
+        if size >= HASH_MMAP_THRESHOLD:
+            try:
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    digest.update(mapped)
+                return digest.hexdigest()
+            except (OSError, ValueError, OverflowError):
+                pass  # mmap unavailable for this file: fall back to reads
+        for chunk in iter(lambda: file.read(HASH_BUFFER_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _file_signature(stat):
+    return stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+def _hash_with_cache(path, algorithm, cache):
+    """Return (digest, cache key, cache entry), skipping files unchanged since last run"""
+    key = (algorithm, os.path.abspath(path))
+    signature = _file_signature(os.stat(path))
+    cached = cache.get(key)
+    if cached and cached[0] == signature:
+        return cached[1], key, None
+    digest = hash_file(path, algorithm)
+    return digest, key, (signature, digest)
+
+def _prune_hash_cache(cache):
+    """Drop entries for files that are gone or changed, then keep the HASH_CACHE_MAX_ENTRIES most recently used"""
+    for key, (signature, _) in list(cache.items()):
+        try:
+            if _file_signature(os.stat(key[1])) == signature:
+                continue
+        except OSError:
+            pass
+        del cache[key]
+    # Entries are kept in order of use, oldest first
+    for key in list(itertools.islice(cache, max(0, len(cache) - HASH_CACHE_MAX_ENTRIES))):
+        del cache[key]
+
+def _walk_files(path):
+    """Yield the files under a directory in a stable (sorted) order"""
+    try:
+        entries = sorted(os.scandir(path), key=lambda entry: entry.name)
+    except OSError as e:
+        print_color(f"hash: {e}", Colors.RED)
+        return
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            yield from _walk_files(entry.path)
+        elif entry.is_file():
+            yield entry.path
+
+def ordered_results(executor, function, items, window):
+    """Submit function(item) for each item, yielding (item, future) in input order.
+
+    At most window calls are in flight, so a huge item stream is never
+    queued all at once.
+    """
+    pending = collections.deque()
+    for item in items:
+        pending.append((item, executor.submit(function, item)))
+        if len(pending) >= window:
+            yield pending.popleft()
+    while pending:
+        yield pending.popleft()
+
+def _read_manifest(path):
+    """Yield (digest, filename) pairs from a sha256sum-style manifest"""
+    with open(path, "r", errors="replace") as manifest:
+        for line in manifest:
+            line = line.rstrip("\r\n")
+            if not line.strip() or line.startswith("#"):
+                continue
+            digest, _, filename = line.partition(" ")
+            yield digest.lower(), filename[1:] if filename[:1] in (" ", "*") else filename
+
+def hash_command(args):
+    """Hash files in parallel, or verify them against a manifest"""
+    global last_exit_status
+    usage = "Usage: hash [-a sha256|sha1|md5|blake2] [-r] [--no-cache] <file...> | hash -c <manifest>"
+    try:
+        options, index = parse_options(args, flags="r", valued="ac", long_flags=("--no-cache",))
+    except ValueError as e:
+        last_exit_status = 1
+        print_color(f"Error: {e}", Colors.RED)
+        print_color(usage, Colors.RED)
+        return
+    algorithm = options.get("a", "sha256").lower()
+    if algorithm not in HASH_ALGORITHMS:
+        last_exit_status = 1
+        print_color(f"Unknown algorithm '{algorithm}'. Choose from: {', '.join(HASH_ALGORITHMS)}", Colors.RED)
+        return
+    if "c" not in options and not has_args(args, index + 1):
+        last_exit_status = 1
+        print_color(usage, Colors.RED)
+        return
+
+    use_cache = "--no-cache" not in options
+    cache = _load_pickle(HASH_CACHE_FILE) if use_cache else {}
+    cache_changed = False
+
+    if "c" in options:
+        try:
+            entries = list(_read_manifest(options["c"]))
+        except OSError as e:
+            last_exit_status = 1
+            print_color(f"hash: {e}", Colors.RED)
+            return
+        paths = entries
+
+        def work(entry):
+            digest, path = entry
+            name = options.get("a") or HASH_LENGTHS.get(len(digest), "sha256")
+            return _hash_with_cache(path, name.lower(), cache)
+    else:
+        def file_operands():
+            for path in stream_args(args, index):
+                if os.path.isdir(path):
+                    if "r" in options:
+                        yield from _walk_files(path)
+                    else:
+                        print_color(f"hash: {path}: is a directory (use -r)", Colors.YELLOW)
+                else:
+                    yield path
+        paths = file_operands()
+
+        def work(path):
+            return _hash_with_cache(path, algorithm, cache)
+
+    failures = 0
+    with concurrent.futures.ThreadPoolExecutor(max_workers=HASH_WORKERS) as executor:
+        try:
+            for item, future in ordered_results(executor, work, paths, HASH_WORKERS * 4):
+                expected, path = item if "c" in options else (None, item)
+                try:
+                    digest, key, entry = future.result()
+                except OSError as e:
+                    failures += 1
+                    if "c" in options:
+                        print(f"{path}: {Colors.RED}FAILED open or read{Colors.ENDC}")
+                    else:
+                        print_color(f"hash: {path}: {e.strerror}", Colors.RED)
+                    continue
+                if entry:
+                    cache.pop(key, None)
+                    cache[key] = entry
+                    cache_changed = True
+                elif key in cache:
+                    cache[key] = cache.pop(key)  # Mark as recently used
+                if "c" in options:
+                    if digest == expected:
+                        print(f"{path}: {Colors.GREEN}OK{Colors.ENDC}")
+                    else:
+                        failures += 1
+                        print(f"{path}: {Colors.RED}FAILED{Colors.ENDC}")
+                else:
+                    print(f"{digest}  {path}")
+        except KeyboardInterrupt:
+            executor.shutdown(wait=False, cancel_futures=True)
+            print_color("\nhash interrupted", Colors.YELLOW)
+
+    if failures:
+        last_exit_status = 1
+        if "c" in options:
+            print_color(f"WARNING: {failures} file(s) did NOT match or could not be read", Colors.RED)
+    if use_cache and cache_changed:
+        _prune_hash_cache(cache)
+        _save_pickle(HASH_CACHE_FILE, cache)
+
+# Watch: re-run a command and redraw only what changed
+
+ANSI_ESCAPE = re.compile(r"\033\[[0-9;?]*[A-Za-z]")
+
+def capture_command_output(words):
+    """Run parsed words with output captured, returning the output lines.
+
+    Builtins, functions, aliases and builtin pipelines run in-process;
+    anything else runs as a system command.
+    """
+    name = "".join(text for text, _ in words[0]) if words and not isinstance(words[0], str) else ""
+    in_process = name.lower() in BUILTIN_COMMANDS or name in shell_functions or name in aliases
+    if in_process or _split_pipeline(resolve_alias(words)):
+        buffer = io.StringIO()
+        with contextlib.redirect_stdout(buffer):
+            run_words(words)
+        return buffer.getvalue().splitlines()
+    if any(isinstance(word, str) for word in words):
+        command = words_to_text(words)
+    else:
+        command = list(expand_words(words))
+        if IS_WINDOWS:
+            command = subprocess.list2cmdline(command)
+    return [line.rstrip("\r\n") for line in stream_command(command)]
+
+def _highlight_changes(line, previous):
+    """Show the characters of line that differ from previous in reverse video"""
+    out = []
+    changed = False
+    for i, char in enumerate(line):
+        differs = i >= len(previous) or previous[i] != char
+        if differs != changed:
+            out.append("\033[7m" if differs else "\033[27m")
+            changed = differs
+        out.append(char)
+    if changed:
+        out.append("\033[27m")
+    return "".join(out)
+
+def watch_command(args):
+    """Re-run a command every few seconds, redrawing only the lines that changed"""
+    global last_exit_status
+    usage = "Usage: watch [-n seconds] [-d] <command>"
+    try:
+        options, index = parse_options(args, flags="d", valued="n")
+        interval = max(0.1, float(options.get("n", 2)))
+    except ValueError as e:
+        last_exit_status = 1
+        print_color(f"Error: {e}", Colors.RED)
+        print_color(usage, Colors.RED)
+        return
+    command_args = list(stream_args(args, index))
+    if not command_args:
+        last_exit_status = 1
+        print_color(usage, Colors.RED)
+        return
+
+    if len(command_args) == 1:
+        # A single argument is a whole command line, e.g. watch "ps | grep python"
+        command_text = command_args[0]
+        words = split_command_line(command_text)
+    else:
+        # Already expanded: quote each argument so it is not expanded again
+        command_text = " ".join(command_args)
+        words = [((arg, "'"),) for arg in command_args]
+
+    previous = []
+    highlighted = set()  # Rows drawn with changes marked, to be redrawn plainly next frame
+    size = None
+    sys.stdout.write("\033[?1049h\033[?25l")  # Alternate screen, hide cursor
+    try:
+        while True:
+            started = time.monotonic()
+            lines = [ANSI_ESCAPE.sub("", line).expandtabs() for line in capture_command_output(words)]
+
+            columns, rows = shutil.get_terminal_size()
+            header = f"Every {interval:g}s: {command_text}"
+            clock = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            if columns > len(clock) + 1:
+                title = f"{header[:columns - len(clock) - 1]:<{columns - len(clock)}}{clock}"
+            else:
+                title = header[:columns]  # Too narrow for the clock
+            frame = [title, ""]
+            frame += [line[:columns] for line in lines[:max(0, rows - 2)]]
+
+            out = []
+            if (columns, rows) != size:
+                # First frame or terminal resized: redraw everything
+                out.append("\033[H\033[2J")
+                previous = []
+                size = (columns, rows)
+            was_highlighted = highlighted
+            highlighted = set()
+            for row, line in enumerate(frame):
+                old = previous[row] if row < len(previous) else None
+                if line == old:
+                    if row not in was_highlighted:
+                        continue
+                    # Unchanged since the last frame: redraw it without that frame's highlight
+                elif "d" in options and old is not None and row >= 2:
+                    line = _highlight_changes(line, old)
+                    highlighted.add(row)
+                out.append(f"\033[{row + 1};1H{line}\033[K")
+            for row in range(len(frame), len(previous)):
+                out.append(f"\033[{row + 1};1H\033[K")
+            sys.stdout.write("".join(out))
+            sys.stdout.flush()
+            previous = frame
+
+            time.sleep(max(0, interval - (time.monotonic() - started)))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sys.stdout.write("\033[?25h\033[?1049l")
+        sys.stdout.flush()
+
+def top_command():
+    """Show top processes"""
+    if IS_WINDOWS:
+        page_output(stream_command("tasklist /v | sort /R /+58"))
+    else:
+        page_output(stream_command("top -n 1 -b"))
+
+def find_command(args):
+    """Find files"""
+    if len(args) < 1:
+        print_color("Usage: find <pattern>", Colors.RED)
+        return
+        
+    pattern = args[0]
+    path = "." if len(args) < 2 else args[1]
+    
+    if IS_WINDOWS:
+        result = execute_command(f"dir /s /b \"{path}\" | findstr \"{pattern}\"")
+    else:
+        result = execute_command(f"find \"{path}\" -name \"*{pattern}*\" 2>/dev/null")
+    
+    if result.strip():
+        print(result)
+    else:
+        print_color(f"No files matching '{pattern}' found.", Colors.YELLOW)
+
+def _tree_children(path, entry_limit, show_hidden, dirs_only):
+    """Yield a directory's entries for tree as (entry, is_last, hidden_count).
+
+    Only the first entry_limit names (in sorted order) are kept in memory;
+    the rest are just counted and reported with the last yielded item.
+    """
+    total = 0
+
+    def entries():
+        nonlocal total
+        with os.scandir(path) as it:
+            for entry in it:
+                if not show_hidden and entry.name.startswith("."):
+                    continue
+                if dirs_only and not entry.is_dir(follow_symlinks=False):
+                    continue
+                total += 1
+                yield entry
+
+    sort_key = lambda entry: entry.name.lower()
+    if entry_limit:
+        shown = heapq.nsmallest(entry_limit, entries(), key=sort_key)
+    else:
+        shown = sorted(entries(), key=sort_key)
+    hidden_count = total - len(shown)
+    for index, entry in enumerate(shown):
+        is_last = index == len(shown) - 1
+        yield entry, is_last and not hidden_count, 0
+    if hidden_count:
+        yield None, True, hidden_count
+
+def tree_lines(root, max_depth=2, entry_limit=TREE_ENTRY_LIMIT, show_hidden=False, dirs_only=False, show_sizes=False):
+    """Yield the lines of a directory tree as the walk progresses"""
+    yield f"{Colors.BLUE}{root}{Colors.ENDC}"
+    dir_count = 0
+    file_count = 0
+    stack = [(_tree_children(root, entry_limit, show_hidden, dirs_only), "")]
+    while stack:
+        children, prefix = stack[-1]
+        try:
+            entry, is_last, hidden_count = next(children)
+        except StopIteration:
+            stack.pop()
+            continue
+        except OSError as e:
+            stack.pop()
+            yield f"{prefix}└── {Colors.RED}[error: {e.strerror}]{Colors.ENDC}"
+            continue
+
+        connector = "└── " if is_last else "├── "
+        if entry is None:
+            yield f"{prefix}{connector}{Colors.YELLOW}... {hidden_count} more entries{Colors.ENDC}"
+            continue
+
+        size = ""
+        if show_sizes:
+            try:
+                size = f"[{format_size(entry.stat(follow_symlinks=False).st_size):>7}]  "
+            except OSError:
+                size = f"[{'?':>7}]  "
+
+        if entry.is_symlink():
+            file_count += 1
+            try:
+                target = os.readlink(entry.path)
+            except OSError:
+                target = "?"
+            yield f"{prefix}{connector}{size}{Colors.CYAN}{entry.name}{Colors.ENDC} -> {target}"
+        elif entry.is_dir(follow_symlinks=False):
+            dir_count += 1
+            yield f"{prefix}{connector}{size}{Colors.BLUE}{entry.name}{Colors.ENDC}"
+            if len(stack) < max_depth:
+                child_prefix = prefix + ("    " if is_last else "│   ")
+                stack.append((_tree_children(entry.path, entry_limit, show_hidden, dirs_only), child_prefix))
+        else:
+            file_count += 1
+            yield f"{prefix}{connector}{size}{entry.name}"
+
+    yield ""
+    yield f"{dir_count} directories" + ("" if dirs_only else f", {file_count} files")
+
+def tree_command(args):
+    """Show directory tree"""
+    global last_exit_status
+    path = "."
+    depth = 2
+    entry_limit = TREE_ENTRY_LIMIT
+    options = {"show_hidden": False, "dirs_only": False, "show_sizes": False}
+    positional = []
+    args = list(args)
+    i = 0
+    try:
+        while i < len(args):
+            if args[i] == "-L":
+                depth = int(args[i + 1])
+                i += 1
+            elif args[i] == "--limit":
+                entry_limit = int(args[i + 1])
+                i += 1
+            elif args[i] == "-a":
+                options["show_hidden"] = True
+            elif args[i] == "-d":
+                options["dirs_only"] = True
+            elif args[i] == "-s":
+                options["show_sizes"] = True
+            else:
+                positional.append(args[i])
+            i += 1
+        if positional:
+            path = positional[0]
+        if len(positional) > 1:
+            depth = int(positional[1])
+    except (IndexError, ValueError):
+        last_exit_status = 1
+        print_color("Usage: tree [-a] [-d] [-s] [-L depth] [--limit N] [path] [depth]", Colors.RED)
+        return
+
+    if not os.path.isdir(path):
+        last_exit_status = 1
+        print_color(f"Error: '{path}' is not a directory", Colors.RED)
+        return
+    page_output(tree_lines(path, depth, entry_limit, **options))
+
+def color_test():
+    """Show a color test pattern"""
+    print_color("=== Color Test ===", Colors.HEADER)
+    print_color("This is HEADER text", Colors.HEADER)
+    print_color("This is BLUE text", Colors.BLUE)
+    print_color("This is CYAN text", Colors.CYAN)
+    print_color("This is GREEN text", Colors.GREEN)
+    print_color("This is YELLOW text", Colors.YELLOW)
+    print_color("This is RED text", Colors.RED)
+    print_color("This is BOLD text", Colors.BOLD)
+    print_color("This is UNDERLINE text", Colors.UNDERLINE)
+    print_color("=================", Colors.HEADER)
+
+# New functions for the update
+
+def progress_bar(iteration, total, prefix='', suffix='', length=50, fill='█'):
+    """Display a progress bar"""
+    percent = ("{0:.1f}").format(100 * (iteration / float(total)))
+    filled_length = int(length * iteration // total)
+    bar = fill * filled_length + '░' * (length - filled_length)
+    print(f'\r{prefix} [{Colors.GREEN}{bar}{Colors.ENDC}] {percent}% {suffix}', end='\r')
+    if iteration == total: 
+        print()
+
+def copy_to_clipboard(text):
+    """Copy text to clipboard based on OS"""
+    try:
+        if IS_WINDOWS:
+            subprocess.run('clip', input=text.encode('utf-8'), check=True)
+        elif IS_MACOS:
+            subprocess.run('pbcopy', input=text.encode('utf-8'), check=True)
+        elif IS_LINUX:
+            subprocess.run(['xclip', '-selection', 'clipboard'], input=text.encode('utf-8'), check=True)
+        print_color("Text copied to clipboard successfully", Colors.GREEN)
+    except Exception as e:
+        print_color(f"Failed to copy to clipboard: {e}", Colors.RED)
+
+def clipboard_command(args):
+    """Handle clipboard operations"""
+    if not args or args[0] not in ['copy', 'paste']:
+        print_color("Usage: clipboard copy <text> OR clipboard paste", Colors.RED)
+        return
+        
+    if args[0] == 'copy' and len(args) > 1:
+        copy_to_clipboard(' '.join(args[1:]))
     elif args[0] == 'paste':
         try:
             if IS_WINDOWS:
@@ -499,6 +2212,24 @@ def clipboard_command(args):
         except Exception as e:
             print_color(f"Failed to paste from clipboard: {e}", Colors.RED)
 
+def _read_cpu_times():
+    """Return (idle, total) jiffies from /proc/stat"""
+    with open("/proc/stat") as stat_file:
+        values = [int(v) for v in stat_file.readline().split()[1:]]
+    return values[3] + values[4], sum(values)
+
+def linux_cpu_percent():
+    """CPU usage since the previous call, read from /proc/stat without spawning top"""
+    global cpu_sample
+    current = _read_cpu_times()
+    if cpu_sample is None:
+        time.sleep(0.1)
+        cpu_sample, current = current, _read_cpu_times()
+    idle = current[0] - cpu_sample[0]
+    total = current[1] - cpu_sample[1]
+    cpu_sample = current
+    return round(100 * (1 - idle / total), 1) if total else 0.0
+
 def cpu_usage():
     """Show CPU usage"""
     print_color("=== CPU Usage ===", Colors.HEADER)
@@ -515,9 +2246,8 @@ def cpu_usage():
             except:
                 print("Could not determine CPU usage")
     elif IS_LINUX:
-        result = execute_command("top -bn1 | grep 'Cpu(s)' | awk '{print $2}'").strip()
         try:
-            usage = float(result)
+            usage = linux_cpu_percent()
             print(f"CPU Load: {usage}%")
             bars = int(usage / 5)
             print(f"[{Colors.GREEN}{'█' * bars}{Colors.ENDC}{'░' * (20-bars)}] {usage}%")
@@ -554,85 +2284,105 @@ def memory_usage():
         except:
             print("Could not determine memory usage")
     elif IS_LINUX:
-        result = execute_command("free -m").strip().split("\n")
-        if len(result) > 1:
-            try:
-                parts = result[1].split()
-                total = int(parts[1])
-                used = int(parts[2])
-                percent = round((used / total) * 100, 2)
-                
-                print(f"Total: {total} MB")
-                print(f"Used: {used} MB ({percent}%)")
-                print(f"Available: {total - used} MB")
-                
-                # Visual progress bar
-                bars = int(percent / 5)
-                print(f"[{Colors.GREEN}{'█' * bars}{Colors.ENDC}{'░' * (20-bars)}] {percent}%")
-            except:
-                print("Could not determine memory usage")
+        try:
+            # Read /proc/meminfo directly instead of spawning free
+            meminfo = {}
+            with open("/proc/meminfo") as meminfo_file:
+                for line in meminfo_file:
+                    name, value = line.split(":", 1)
+                    meminfo[name] = int(value.split()[0])
+            total = meminfo["MemTotal"] // 1024
+            cached = meminfo.get("Buffers", 0) + meminfo.get("Cached", 0) + meminfo.get("SReclaimable", 0)
+            used = (meminfo["MemTotal"] - meminfo["MemFree"] - cached) // 1024
+            percent = round((used / total) * 100, 2)
+            
+            print(f"Total: {total} MB")
+            print(f"Used: {used} MB ({percent}%)")
+            print(f"Available: {total - used} MB")
+            
+            # Visual progress bar
+            bars = int(percent / 5)
+            print(f"[{Colors.GREEN}{'█' * bars}{Colors.ENDC}{'░' * (20-bars)}] {percent}%")
+        except:
+            print("Could not determine memory usage")
     elif IS_MACOS:
         result = execute_command("vm_stat").strip()
         print(result)
         
     print_color("=================", Colors.HEADER)
 
+def copy_file(source, destination):
+    """Copy a single file in chunks with a progress bar"""
+    # Get file size
+    file_size = os.path.getsize(source)
+    
+    with open(source, 'rb') as src_file:
+        with open(destination, 'wb') as dst_file:
+            copied = 0
+            chunk_size = 1024 * 1024  # 1MB chunks
+            
+            while True:
+                chunk = src_file.read(chunk_size)
+                if not chunk:
+                    break
+                    
+                dst_file.write(chunk)
+                copied += len(chunk)
+                
+                # Update progress
+                progress_bar(copied, file_size, 
+                            prefix=f"Copying {os.path.basename(source)}", 
+                            suffix=f"{round(copied/1024/1024, 1)}/{round(file_size/1024/1024, 1)} MB")
+    shutil.copymode(source, destination)
+
 def cp_command(args):
     """Copy files with progress indicator"""
-    if len(args) < 2:
-        print_color("Usage: cp <source> <destination>", Colors.RED)
+    global last_exit_status
+    if not has_args(args, 2):
+        print_color("Usage: cp <source> [source...] <destination>", Colors.RED)
         return
-        
-    source = args[0]
-    destination = args[1]
-    
-    if not os.path.exists(source):
-        print_color(f"Error: Source file '{source}' does not exist", Colors.RED)
+
+    # The destination is the last argument, so the source list has to be materialized
+    args = list(args)
+    sources = args[:-1]
+    destination = args[-1]
+
+    if len(sources) > 1 and not os.path.isdir(destination):
+        last_exit_status = 1
+        print_color(f"Error: Destination '{destination}' is not a directory", Colors.RED)
         return
-        
-    try:
-        # Get file size
-        file_size = os.path.getsize(source)
-        
-        with open(source, 'rb') as src_file:
-            with open(destination, 'wb') as dst_file:
-                copied = 0
-                chunk_size = 1024 * 1024  # 1MB chunks
-                
-                while True:
-                    chunk = src_file.read(chunk_size)
-                    if not chunk:
-                        break
-                        
-                    dst_file.write(chunk)
-                    copied += len(chunk)
-                    
-                    # Update progress
-                    progress_bar(copied, file_size, 
-                                prefix=f"Copying {os.path.basename(source)}", 
-                                suffix=f"{round(copied/1024/1024, 1)}/{round(file_size/1024/1024, 1)} MB")
-                
-        print_color(f"\nCopied {source} to {destination} successfully", Colors.GREEN)
-    except Exception as e:
-        print_color(f"Error copying file: {e}", Colors.RED)
+
+    for source in sources:
+        if not os.path.isfile(source):
+            last_exit_status = 1
+            print_color(f"Error: Source file '{source}' does not exist", Colors.RED)
+            continue
+
+        target = os.path.join(destination, os.path.basename(source)) if os.path.isdir(destination) else destination
+        try:
+            copy_file(source, target)
+            print_color(f"\nCopied {source} to {target} successfully", Colors.GREEN)
+        except Exception as e:
+            last_exit_status = 1
+            print_color(f"Error copying file: {e}", Colors.RED)
 
 def weather_command(args):
     """Show weather using wttr.in"""
-    if not args:
-        location = ""  # Default to current location
-    else:
-        location = args[0]
-        
+    locations = args if args else [""]  # Default to current location
+
     print_color("Fetching weather data...", Colors.CYAN)
-    
-    # Format: Show compact weather report with no location emoji
-    result = execute_command(f"curl -s 'wttr.in/{location}?format=3'")
-    
-    if "Sorry" in result or not result.strip():
-        print_color("Weather service not available or location not found", Colors.RED)
-        return
-        
-    print(result)
+
+    async def fetch_all():
+        # Format: Show compact weather report with no location emoji
+        return await asyncio.gather(
+            *(http_get_async(f"https://wttr.in/{location}?format=3", ttl=WEATHER_CACHE_TTL) for location in locations),
+            return_exceptions=True)
+
+    for result in asyncio.run(fetch_all()):
+        if isinstance(result, Exception) or result.status != 200 or "Sorry" in result.text() or not result.text().strip():
+            print_color("Weather service not available or location not found", Colors.RED)
+            continue
+        print(result.text().rstrip("\n"))
 
 def add_to_history(command):
     """Add command to history"""
@@ -643,8 +2393,7 @@ def add_to_history(command):
 
 def history_command():
     """Display command history"""
-    for i, cmd in enumerate(command_history, 1):
-        print(f"{i}: {cmd}")
+    page_output(f"{i}: {cmd}" for i, cmd in enumerate(command_history, 1))
 
 def get_previous_command():
     """Get previous command from history"""
@@ -662,14 +2411,210 @@ def get_next_command():
         return command_history[history_position] if history_position < len(command_history) else ""
     return ""
 
+# HTTP client with keep-alive connection pool and on-disk response cache
+
+_http_pool = {}
+_http_pool_lock = threading.Lock()
+
+class HTTPResult:
+    """A fully read HTTP response, either fresh from the network or from the cache"""
+    def __init__(self, status, headers, body, url, from_cache=False):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.url = url
+        self.from_cache = from_cache
+
+    def text(self):
+        return self.body.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.body.decode("utf-8"))
+
+def _http_connection(scheme, host, port, timeout):
+    """Take an idle pooled connection for the host or open a new one"""
+    with _http_pool_lock:
+        idle = _http_pool.get((scheme, host, port))
+        if idle:
+            conn = idle.pop()
+            conn.timeout = timeout
+            if conn.sock:
+                conn.sock.settimeout(timeout)
+            return conn, True
+    if scheme == "https":
+        return http.client.HTTPSConnection(host, port, timeout=timeout), False
+    return http.client.HTTPConnection(host, port, timeout=timeout), False
+
+def _http_release(scheme, host, port, conn, response):
+    """Return a connection to the pool if its response was fully consumed"""
+    if not response.isclosed() or response.will_close:
+        conn.close()
+        return
+    with _http_pool_lock:
+        idle = _http_pool.setdefault((scheme, host, port), [])
+        if len(idle) < HTTP_POOL_SIZE:
+            idle.append(conn)
+            return
+    conn.close()
+
+def _http_send(scheme, host, port, path, headers, timeout):
+    """Send a GET request, retrying once if a pooled connection went stale"""
+    while True:
+        conn, reused = _http_connection(scheme, host, port, timeout)
+        try:
+            conn.request("GET", path, headers=headers)
+            return conn, conn.getresponse()
+        except (http.client.RemoteDisconnected, http.client.BadStatusLine,
+                ConnectionResetError, BrokenPipeError):
+            conn.close()
+            if not reused:
+                raise
+        except Exception:
+            conn.close()
+            raise
+
+@contextlib.contextmanager
+def http_open(url, headers=None, timeout=HTTP_TIMEOUT, max_redirects=5):
+    """Open a streaming GET request on a keep-alive connection, following redirects"""
+    request_headers = {"User-Agent": HTTP_USER_AGENT, "Accept-Encoding": "identity"}
+    request_headers.update(headers or {})
+
+    for _ in range(max_redirects + 1):
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            raise ValueError(f"Unsupported URL scheme: {url}")
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+
+        conn, response = _http_send(parts.scheme, parts.hostname, port, path, request_headers, timeout)
+        location = response.getheader("Location")
+        if response.status in (301, 302, 303, 307, 308) and location:
+            response.read()
+            _http_release(parts.scheme, parts.hostname, port, conn, response)
+            url = urljoin(url, location)
+            continue
+
+        response.url = url
+        try:
+            yield response
+        finally:
+            _http_release(parts.scheme, parts.hostname, port, conn, response)
+        return
+
+    raise http.client.HTTPException(f"Too many redirects for {url}")
+
+def _http_cache_paths(url):
+    """Return the metadata and body file paths for a cached URL"""
+    key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+    base = os.path.join(HTTP_CACHE_DIR, key)
+    return base + ".json", base + ".body"
+
+def _http_cache_load(url):
+    """Load a cached response as (metadata, body), or None if not cached"""
+    meta_path, body_path = _http_cache_paths(url)
+    try:
+        with open(meta_path, "r") as meta_file:
+            meta = json.load(meta_file)
+        with open(body_path, "rb") as body_file:
+            body = body_file.read()
+    except (OSError, ValueError):
+        return None
+    try:
+        os.utime(body_path)  # Mark as recently used for eviction
+    except OSError:
+        pass
+    return meta, body
+
+def _http_cache_store(url, meta, body=None):
+    """Write a response to the cache and evict old entries beyond the size limit"""
+    meta_path, body_path = _http_cache_paths(url)
+    try:
+        os.makedirs(HTTP_CACHE_DIR, exist_ok=True)
+        if body is not None:
+            with open(body_path + ".tmp", "wb") as body_file:
+                body_file.write(body)
+            os.replace(body_path + ".tmp", body_path)
+        with open(meta_path + ".tmp", "w") as meta_file:
+            json.dump(meta, meta_file)
+        os.replace(meta_path + ".tmp", meta_path)
+        if body is not None:
+            _http_cache_evict()
+    except OSError:
+        pass  # The cache is best effort
+
+def _http_cache_evict():
+    """Delete least recently used cache entries until under HTTP_CACHE_MAX_BYTES"""
+    entries = []
+    total = 0
+    with os.scandir(HTTP_CACHE_DIR) as it:
+        for entry in it:
+            if entry.name.endswith(".body"):
+                stat = entry.stat()
+                entries.append((stat.st_atime, stat.st_size, entry.path))
+                total += stat.st_size
+    if total <= HTTP_CACHE_MAX_BYTES:
+        return
+    for _, size, body_path in sorted(entries):
+        for path in (body_path, body_path[:-len(".body")] + ".json"):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        total -= size
+        if total <= HTTP_CACHE_MAX_BYTES:
+            break
+
+def http_get(url, headers=None, timeout=HTTP_TIMEOUT, ttl=HTTP_CACHE_TTL, use_cache=True):
+    """Fetch a URL, serving fresh cache hits directly and revalidating stale ones"""
+    cached = _http_cache_load(url) if use_cache else None
+    if cached:
+        meta, body = cached
+        if time.time() - meta["stored_at"] < ttl:
+            return HTTPResult(meta["status"], meta["headers"], body, url, from_cache=True)
+
+    request_headers = dict(headers or {})
+    if cached:
+        if meta["headers"].get("etag"):
+            request_headers["If-None-Match"] = meta["headers"]["etag"]
+        if meta["headers"].get("last-modified"):
+            request_headers["If-Modified-Since"] = meta["headers"]["last-modified"]
+
+    try:
+        with http_open(url, request_headers, timeout=timeout) as response:
+            body = response.read()
+            status = response.status
+            response_headers = {k.lower(): v for k, v in response.getheaders()}
+    except (OSError, http.client.HTTPException):
+        if cached:
+            # Offline or server unreachable: a stale answer beats none
+            return HTTPResult(meta["status"], meta["headers"], cached[1], url, from_cache=True)
+        raise
+
+    if status == 304 and cached:
+        meta["stored_at"] = time.time()
+        _http_cache_store(url, meta)
+        return HTTPResult(meta["status"], meta["headers"], cached[1], url, from_cache=True)
+
+    if use_cache and status == 200:
+        kept = {k: response_headers[k] for k in ("etag", "last-modified", "content-type") if k in response_headers}
+        _http_cache_store(url, {"url": url, "status": status, "headers": kept, "stored_at": time.time()}, body)
+    return HTTPResult(status, response_headers, body, url)
+
+async def http_get_async(url, **kwargs):
+    """Non-blocking http_get for use under asyncio"""
+    return await asyncio.to_thread(http_get, url, **kwargs)
+
 def check_for_updates():
     """Check GitHub for updates"""
     print_color("Checking for Yash Terminal updates on GitHub...", Colors.CYAN)
     try:
-        # Fetch the latest release info from GitHub
-        with urllib.request.urlopen(GITHUB_REPO) as response:
-            data = json.loads(response.read().decode())
-            
+        # Fetch the latest release info from GitHub (cached, revalidated with ETag)
+        result = http_get(GITHUB_REPO, headers={"Accept": "application/vnd.github+json"})
+        if result.status != 200:
+            raise RuntimeError(f"GitHub API returned HTTP {result.status}")
+        data = result.json()
+        last_release.update(data)
+
         # Get latest version (strip 'v' prefix if present)
         latest_version = data['tag_name'].lstrip('v')
         
@@ -687,11 +2632,190 @@ def check_for_updates():
             return False, CURRENT_VERSION, None
             
     except Exception as e:
-        print_color(f"Error checking for updates: {e}", Colors.RED)
-        return False, CURRENT_VERSION, None
+        print_color(f"Error checking for updates: {e}", Colors.RED)
+        return False, CURRENT_VERSION, None
+
+def download_file(url, destination, progress=None, timeout=HTTP_TIMEOUT):
+    """Stream a URL to disk, resuming a partial download with an HTTP Range request"""
+    part_path = destination + ".part"
+    attempts = 0
+    while True:
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+        try:
+            with http_open(url, headers, timeout=timeout) as response:
+                if response.status == 416 and offset:
+                    # Server says there is nothing past our offset: the part file is complete
+                    response.read()
+                    break
+                if response.status not in (200, 206):
+                    response.read()
+                    raise http.client.HTTPException(f"Download failed with HTTP {response.status}")
+
+                if response.status == 206:
+                    content_range = response.getheader("Content-Range", "")
+                    total = int(content_range.rsplit("/", 1)[1]) if "/" in content_range and not content_range.endswith("*") else 0
+                    mode = "ab"
+                else:
+                    # Server ignored the Range header, start over
+                    offset = 0
+                    total = int(response.getheader("Content-Length") or 0)
+                    mode = "wb"
+
+                with open(part_path, mode) as part_file:
+                    done = offset
+                    while True:
+                        chunk = response.read1(DOWNLOAD_CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        part_file.write(chunk)
+                        done += len(chunk)
+                        if progress:
+                            progress(done, total)
+                if total and done < total:
+                    raise http.client.IncompleteRead(b"", total - done)
+            break
+        except (OSError, http.client.HTTPException):
+            attempts += 1
+            if attempts > DOWNLOAD_RETRIES:
+                raise
+            time.sleep(min(2 ** attempts, 10))
+    os.replace(part_path, destination)
+    return destination
+
+def file_sha256(path):
+    """Compute the SHA-256 hex digest of a file"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def release_checksum(release):
+    """Find the published SHA-256 for a release archive, from a checksum asset or the notes"""
+    for asset in release.get("assets", []):
+        name = asset.get("name", "").lower()
+        if name.endswith(".sha256") or name in ("sha256sums", "sha256sums.txt", "checksums.txt"):
+            try:
+                result = http_get(asset["browser_download_url"], use_cache=False)
+            except (OSError, http.client.HTTPException) as e:
+                # Unreachable checksum asset: treat it as unavailable rather than failing the update
+                print_color(f"Could not fetch {asset.get('name')}: {e}", Colors.YELLOW)
+                continue
+            match = re.search(r"\b[0-9a-fA-F]{64}\b", result.text())
+            if result.status == 200 and match:
+                return match.group(0).lower()
+    match = re.search(r"sha256[:=\s`]*([0-9a-fA-F]{64})", release.get("body") or "", re.IGNORECASE)
+    return match.group(1).lower() if match else None
+
+def install_update(archive_path):
+    """Atomically replace the running yash.py with the one in a release archive"""
+    with zipfile.ZipFile(archive_path) as archive:
+        bad_member = archive.testzip()
+        if bad_member:
+            raise ValueError(f"Corrupt archive member: {bad_member}")
+        candidates = [name for name in archive.namelist() if os.path.basename(name) == "yash.py"]
+        if not candidates:
+            raise ValueError("Release archive does not contain yash.py")
+        new_source = archive.read(min(candidates, key=len))
+
+    # Refuse to install something that is not even valid Python
+    compile(new_source, "yash.py", "exec")
+
+    target = os.path.abspath(__file__)
+    backup = target + ".bak"
+    staged = target + ".new"
+    with open(staged, "wb") as staged_file:
+        staged_file.write(new_source)
+        staged_file.flush()
+        os.fsync(staged_file.fileno())
+    shutil.copymode(target, staged)
+    shutil.copy2(target, backup)
+    try:
+        os.replace(staged, target)
+        with open(target, "rb") as installed:
+            if installed.read() != new_source:
+                raise OSError("Installed file does not match the downloaded release")
+    except Exception:
+        os.replace(backup, target)  # Roll back to the previous version
+        raise
+    finally:
+        if os.path.exists(staged):
+            os.remove(staged)
+    return backup
+
+def run_update(version, url, expected_sha256):
+    """Download, verify and install a release, recording progress in update_state"""
+    def progress(done, total):
+        update_state["done"] = done
+        update_state["total"] = total
+
+    try:
+        os.makedirs(UPDATE_DIR, exist_ok=True)
+        archive_path = os.path.join(UPDATE_DIR, f"yash-{version}.zip")
+        update_state["status"] = "downloading"
+        if not os.path.exists(archive_path):
+            download_file(url, archive_path, progress)
+
+        update_state["status"] = "verifying"
+        if expected_sha256:
+            actual = file_sha256(archive_path)
+            if actual != expected_sha256:
+                os.remove(archive_path)
+                raise ValueError(f"Checksum mismatch: expected {expected_sha256}, got {actual}")
+
+        update_state["status"] = "installing"
+        try:
+            install_update(archive_path)
+        except (zipfile.BadZipFile, ValueError, SyntaxError):
+            # A bad archive fails the same way every time: fetch it afresh on the next try
+            os.remove(archive_path)
+            raise
+        os.remove(archive_path)
+        update_state["status"] = "done"
+    except Exception as e:
+        update_state["status"] = "failed"
+        update_state["error"] = e
+    update_state["reported"] = False
 
-def update_yash():
+def show_update_progress():
+    """Show the state of a running or finished update"""
+    status = update_state["status"]
+    if status == "idle":
+        print_color("No update in progress.", Colors.YELLOW)
+    elif status == "downloading" and update_state["total"]:
+        progress_bar(update_state["done"], update_state["total"], prefix="Downloading:",
+                     suffix=f"{round(update_state['done']/1024/1024, 1)}/{round(update_state['total']/1024/1024, 1)} MB", length=40)
+        if update_state["done"] < update_state["total"]:
+            print()
+    elif status == "downloading":
+        print_color(f"Downloading: {round(update_state['done']/1024/1024, 1)} MB", Colors.CYAN)
+    else:
+        report_update_result(force=True)
+
+def report_update_result(force=False):
+    """Announce a finished background update once"""
+    if update_state["reported"] and not force:
+        return
+    update_state["reported"] = True
+    if update_state["status"] == "done":
+        print_color(f"\n✨ Yash Terminal is now updated to version v{update_state['version']}!", Colors.GREEN)
+        print_color("🔄 Please restart Yash to enjoy the awesomeness.", Colors.YELLOW)
+    elif update_state["status"] == "failed":
+        print_color(f"\nUpdate failed: {update_state['error']}", Colors.RED)
+        print_color("Your current version was left untouched. Run 'update' to resume.", Colors.YELLOW)
+    else:
+        print_color(f"Update {update_state['status']}...", Colors.CYAN)
+
+def update_yash(args=[]):
     """Check for and perform updates"""
+    if args and args[0] == "status":
+        show_update_progress()
+        return
+    if update_state["status"] in ("downloading", "verifying", "installing"):
+        print_color("An update is already running. Use 'update status' to follow it.", Colors.YELLOW)
+        return
+
     update_available, latest_version, download_url = check_for_updates()
     
     if update_available:
@@ -701,15 +2825,22 @@ def update_yash():
 
         if choice in ['', 'y']:
             print_color("\nUpdating Yash Terminal... Hold tight! 🎯", Colors.GREEN)
-            print_color("Fetching magic bytes from GitHub... 🧙‍♂️", Colors.CYAN)
+            expected_sha256 = release_checksum(last_release)
+            if not expected_sha256:
+                print_color("No published checksum for this release; only archive integrity will be checked.", Colors.YELLOW)
 
-            # Simulate download
-            for i in range(0, 101, 5):
-                progress_bar(i, 100, prefix="Downloading:", suffix="Complete", length=40)
-                time.sleep(0.07)
+            update_state.update(status="downloading", version=latest_version, done=0, total=0, error=None, reported=True)
+            worker = threading.Thread(target=run_update, args=(latest_version, download_url, expected_sha256), daemon=True)
+            worker.start()
 
-            print_color(f"\n✨ Yash Terminal is now updated to version v{latest_version}!", Colors.GREEN)
-            print_color("🔄 Please restart Yash to enjoy the awesomeness.", Colors.YELLOW)
+            if "--wait" in args:
+                while worker.is_alive():
+                    if update_state["total"]:
+                        progress_bar(update_state["done"], update_state["total"], prefix="Downloading:", suffix="", length=40)
+                    worker.join(0.1)
+                report_update_result()
+            else:
+                print_color("Downloading in the background. Use 'update status' to check progress.", Colors.CYAN)
         else:
             print_color("Update skipped. To Latest Version Update!", Colors.RED)
     else:
@@ -723,10 +2854,14 @@ def help_command():
         "clear": "Clear the screen",
         "ls/dir [path]": "List directory contents",
         "cd [dir]": "Change directory",
+        "z [-l] <fragment...>": "Jump to a frequently and recently visited directory",
         "pwd/cd (no args)": "Print working directory",
         "mkdir <dir>": "Create directory",
         "touch/echo > <file>": "Create or update file",
-        "cat/type <file>": "Display file contents",
+        "cat/type <file...>": "Display file contents",
+        "tail [-n N] [-f] <file...>": "Show (and follow) the end of files",
+        "head/wc/sort/uniq/cut": "Streaming text tools (sort -k POS1[,POS2] -s; -S size spills to disk)",
+        "<cmd> | grep/sort/...": "Builtin filters run in-process",
         "date/time": "Show current date and time",
         "echo <text>": "Display text",
         "whoami": "Show current user",
@@ -734,20 +2869,35 @@ def help_command():
         "sysinfo": "Display system information",
         "colors": "Show color test",
         "history": "Show command history",
+        "tree [-a -d -s] [path] [depth]": "Show directory tree",
+        "du [-d N] [-n N] [--cache] [path]": "Directory sizes (-n: N largest; --cache is faster but misses files resized in place)",
+        "hash [-a algo] [-r] <file...>": "Checksum files in parallel (-c manifest to verify)",
+        "less/more <file...>": "Page through files (long output pages automatically)",
         "clipboard copy/paste": "Copy/paste text to/from clipboard",
         "cpu": "Show CPU usage",
         "memory": "Show memory usage",
-        "cp <src> <dst>": "Copy files with progress",
-        "update": "Check for and perform updates",
+        "watch [-n secs] [-d] <cmd>": "Re-run a command, redrawing changed lines",
+        "cp <src...> <dst>": "Copy files with progress",
+        "weather [location...]": "Show weather (cached for 10 minutes)",
+        "update [status|--wait]": "Download and install updates in the background",
+        "alias [name=value]": "Define or list aliases",
+        "export NAME=value": "Set an environment variable",
+        "source <file>": "Run commands from a file (~/.yashrc runs at startup)",
         "exit": "Exit Yash Terminal"
     }
+
+    expansion_help = {
+        "$VAR ${VAR} $?": "Variables and last exit status",
+        "~ ~user": "Home directories",
+        "{a,b} {1..5}": "Brace expansion",
+        "* ? [abc] **": "Filename globbing",
+    }
     
     windows_commands = {
         "ipconfig": "Show network configuration",
         "tasklist": "Show running processes",
         "ping <host>": "Ping a host",
         "netstat": "Show network connections",
-        "tree [path]": "Show directory tree",
         "findstr <pattern> <file>": "Search for pattern in file",
         "wmic": "Access WMI interface",
         "winget install <pkg>": "Install package",
@@ -761,8 +2911,7 @@ def help_command():
         "ping <host>": "Ping a host",
         "netstat/ss": "Show network connections",
         "df": "Show disk usage",
-        "grep <pattern> <file>": "Search for pattern in file",
-        "tree [path]": "Show directory tree",
+        "grep <pattern> <file...>": "Search for pattern in files",
         "apt/dnf install <pkg>": "Install package",
         "apt/dnf upgrade": "Upgrade system"
     }
@@ -772,6 +2921,10 @@ def help_command():
     for cmd, desc in common_commands.items():
         print(f"{Colors.GREEN}{cmd:<22}{Colors.ENDC} - {desc}")
     
+    print_color("\nExpansion (not inside single quotes):", Colors.BOLD)
+    for syntax, desc in expansion_help.items():
+        print(f"{Colors.YELLOW}{syntax:<22}{Colors.ENDC} - {desc}")
+
     # Print OS-specific commands
     if IS_WINDOWS:
         print_color("\nWindows-Specific Commands:", Colors.BOLD)
@@ -782,40 +2935,716 @@ def help_command():
         for cmd, desc in unix_commands.items():
             print(f"{Colors.CYAN}{cmd:<22}{Colors.ENDC} - {desc}")
 
+# Command line parsing and expansion
+
+class ArgList:
+    """Lazily expanded argument list.
+
+    Indexing and len() expand (and keep) only as many arguments as needed;
+    stream_args() walks the rest without keeping them, so a glob matching
+    millions of files never becomes one giant list.
+    """
+    def __init__(self, iterable):
+        self._items = []
+        self._source = iter(iterable)
+
+    def _fill(self, count=None):
+        while count is None or len(self._items) < count:
+            try:
+                self._items.append(next(self._source))
+            except StopIteration:
+                break
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            if index.stop is not None and index.stop >= 0 and (index.start or 0) >= 0:
+                self._fill(index.stop)
+            else:
+                self._fill()
+            return self._items[index]
+        self._fill(None if index < 0 else index + 1)
+        return self._items[index]
+
+    def __len__(self):
+        self._fill()
+        return len(self._items)
+
+    def __bool__(self):
+        self._fill(1)
+        return bool(self._items)
+
+    def __iter__(self):
+        self._fill()
+        return iter(self._items)
+
+    def stream(self, start=0):
+        """Yield arguments from start onwards, consuming the unexpanded tail"""
+        index = start
+        while index < len(self._items):
+            yield self._items[index]
+            index += 1
+        skip = max(0, start - len(self._items))
+        for item in self._source:
+            if skip:
+                skip -= 1
+                continue
+            yield item
+
+def stream_args(args, start=0):
+    """Iterate arguments from start without materializing a lazy ArgList"""
+    if isinstance(args, ArgList):
+        return args.stream(start)
+    return iter(args[start:])
+
+def has_args(args, count):
+    """Check that at least count arguments exist, expanding no more than that"""
+    return len(args[:count]) >= count
+
+SHELL_OPERATOR_CHARS = "|&;<>()`"
+
+class Word(tuple):
+    """A parsed word's (text, quote) segments, remembering the line it came from and its span there"""
+
+class Operator(str):
+    """A run of unquoted shell operator characters, remembering the line it came from and its span there"""
+
+def _token(cls, value, source, start, end):
+    token = cls(value)
+    token.source, token.start, token.end = source, start, end
+    return token
+
+def split_command_line(cmd_line):
+    """Split a command line into words, keeping track of quoting.
+
+    Each word is a Word tuple of (text, quote) segments where quote is '',
+    "'" or '"'. Unquoted runs of shell operator characters are returned as
+    Operator strings instead. Both record their span in cmd_line, so text
+    for the system shell can be taken from the line as typed.
+    """
+    words = []
+    segments = []
+    current = ""
+    quote_char = ""
+    in_word = False
+    word_start = 0
+    last_was_space = True
+    end = len(cmd_line)
+
+    def end_segment():
+        nonlocal current
+        if current or quote_char:
+            segments.append((current, quote_char))
+        current = ""
+
+    for i, char in enumerate(cmd_line):
+        if quote_char:
+            if char == quote_char:
+                end_segment()
+                quote_char = ""
+            else:
+                current += char
+        elif char in ['"', "'"]:
+            end_segment()
+            quote_char = char
+            if not in_word:
+                word_start = i
+            in_word = True
+        elif char == '#' and not in_word:
+            end = i
+            break  # Comment to end of line
+        elif char in (' ', '\t') or char in SHELL_OPERATOR_CHARS:
+            end_segment()
+            if in_word:
+                words.append(_token(Word, segments, cmd_line, word_start, i))
+                segments = []
+                in_word = False
+            if char in SHELL_OPERATOR_CHARS:
+                if words and isinstance(words[-1], str) and not last_was_space:
+                    words[-1] = _token(Operator, words[-1] + char, cmd_line, words[-1].start, i + 1)
+                else:
+                    words.append(_token(Operator, char, cmd_line, i, i + 1))
+        else:
+            current += char
+            if not in_word:
+                word_start = i
+            in_word = True
+        last_was_space = char in (' ', '\t')
+
+    if quote_char:
+        # Unterminated quote: keep the text as if it had been closed
+        end_segment()
+    end_segment()
+    if in_word:
+        words.append(_token(Word, segments, cmd_line, word_start, end))
+    return words
+
+@functools.lru_cache(maxsize=1024)
+def parse_command_line(cmd_line):
+    """Split a command line, caching the result as a tuple so it can be shared"""
+    return tuple(split_command_line(cmd_line))
+
+def lookup_command(name, path):
+    """Find an executable on a PATH string, remembering where it was found"""
+    found = command_paths.get((name, path))
+    if found is None or not os.access(found, os.X_OK):
+        found = shutil.which(name, path=path)
+        if found is None:
+            return None
+        command_paths[(name, path)] = found
+    return found
+
+def words_to_text(words):
+    """Turn parsed words back into command line text.
+
+    Consecutive words parsed from the same line are copied from that line,
+    so text like 2>/dev/null or $((1+2)) reaches the system shell as typed.
+    """
+    parts = []
+    span = None  # [source, start, end] of the run of words being copied
+    for word in words:
+        source = getattr(word, "source", None)
+        if source is not None and span and source is span[0] and word.start >= span[2]:
+            span[2] = word.end
+            continue
+        if span:
+            parts.append(span[0][span[1]:span[2]])
+            span = None
+        if source is not None:
+            span = [source, word.start, word.end]
+        elif isinstance(word, str):
+            parts.append(word)
+        else:
+            parts.append("".join(f"{quote}{text}{quote}" for text, quote in word))
+    if span:
+        parts.append(span[0][span[1]:span[2]])
+    return " ".join(parts)
+
+def _lookup_var(name):
+    """Return the value of a shell variable"""
+    if name == "?":
+        return str(previous_exit_status)
+    if name == "$":
+        return str(os.getpid())
+    if name.isdigit() or name in ("@", "*", "#"):
+        # Positional parameters of the innermost running shell function
+        params = function_args_stack[-1] if function_args_stack else []
+        if name in ("@", "*"):
+            return " ".join(params)
+        if name == "#":
+            return str(len(params))
+        index = int(name)
+        return params[index - 1] if 0 < index <= len(params) else ("yash" if index == 0 else "")
+    return os.environ.get(name, "")
+
+_VAR_NAME = re.compile(r"[A-Za-z_][A-Za-z0-9_]*|[0-9?$@*#]")
+
+def _expand_vars(chars):
+    """Substitute $NAME, ${NAME} and $? in unquoted and double-quoted characters"""
+    result = []
+    i = 0
+    while i < len(chars):
+        char, quote = chars[i]
+        if char != "$" or quote == "'":
+            result.append(chars[i])
+            i += 1
+            continue
+        rest = "".join(c for c, q in chars[i + 1:i + 256] if q == quote)
+        if rest.startswith("{") and "}" in rest:
+            name = rest[1:rest.index("}")]
+            consumed = len(name) + 2
+        else:
+            match = _VAR_NAME.match(rest)
+            name = match.group(0) if match else None
+            consumed = len(name) if name else 0
+        if not name:
+            result.append(chars[i])
+            i += 1
+            continue
+        # Substituted text is literal: it is not globbed again
+        result.extend((c, '"') for c in _lookup_var(name))
+        i += 1 + consumed
+    return result
+
+def _find_brace(chars):
+    """Find an unquoted {a,b} or {1..3} group, returning (start, end, alternatives)"""
+    for start, (char, quote) in enumerate(chars):
+        if char != "{" or quote:
+            continue
+        depth = 0
+        commas = []
+        for end in range(start, len(chars)):
+            c, q = chars[end]
+            if q:
+                continue
+            if c == "{":
+                depth += 1
+            elif c == "}":
+                depth -= 1
+                if depth == 0:
+                    break
+            elif c == "," and depth == 1:
+                commas.append(end)
+        else:
+            return None
+        if commas:
+            bounds = [start] + commas + [end]
+            return start, end, [chars[a + 1:b] for a, b in zip(bounds, bounds[1:])]
+        body = "".join(c for c, _ in chars[start + 1:end])
+        match = re.fullmatch(r"(-?\d+)\.\.(-?\d+)|([A-Za-z])\.\.([A-Za-z])", body)
+        if match:
+            if match.group(1) is not None:
+                first, last = int(match.group(1)), int(match.group(2))
+                step = 1 if last >= first else -1
+                values = [str(n) for n in range(first, last + step, step)]
+            else:
+                first, last = ord(match.group(3)), ord(match.group(4))
+                step = 1 if last >= first else -1
+                values = [chr(n) for n in range(first, last + step, step)]
+            return start, end, [[(v, "")] if len(v) == 1 else [(c, "") for c in v] for v in values]
+    return None
+
+def _expand_braces(chars):
+    """Yield every brace expansion of a word, left to right"""
+    found = _find_brace(chars)
+    if not found:
+        yield chars
+        return
+    start, end, alternatives = found
+    for alternative in alternatives:
+        yield from _expand_braces(chars[:start] + list(alternative) + chars[end + 1:])
+
+def _expand_tilde(chars):
+    """Expand a leading unquoted ~ or ~user"""
+    if not chars or chars[0] != ("~", ""):
+        return chars
+    end = 0
+    while end < len(chars) and chars[end][0] not in ("/", os.sep):
+        if chars[end][1]:
+            return chars
+        end += 1
+    prefix = "".join(c for c, _ in chars[:end])
+    expanded = os.path.expanduser(prefix)
+    if expanded == prefix:
+        return chars
+    return [(c, "'") for c in expanded] + chars[end:]
+
+def expand_word(word):
+    """Yield the fields a single parsed word expands to"""
+    # Fast path for plain words with nothing to expand
+    if len(word) == 1 and not word[0][1] and not any(c in word[0][0] for c in "$~{*?["):
+        yield word[0][0]
+        return
+    if len(word) == 1 and word[0][1] == "'":
+        yield word[0][0]
+        return
+
+    chars = [(c, quote) for text, quote in word for c in text]
+    for alternative in _expand_braces(chars):
+        alternative = _expand_vars(_expand_tilde(alternative))
+        text = "".join(c for c, _ in alternative)
+        if not any(c in "*?[" and not q for c, q in alternative):
+            yield text
+            continue
+
+        # Quoted characters take part in the pattern literally
+        pattern = "".join(c if not q or c not in "*?[]" else f"[{c}]" for c, q in alternative)
+        matched = False
+        for path in iter_glob(pattern):
+            matched = True
+            yield path
+        if not matched:
+            yield text  # Like sh, a pattern without matches is passed through
+
+def expand_words(words):
+    """Lazily expand parsed words into argument strings"""
+    for word in words:
+        yield from expand_word(word)
+
+@functools.lru_cache(maxsize=256)
+def _compile_glob(pattern):
+    """Compile a glob path component to a regex matcher, once per pattern"""
+    return re.compile(fnmatch.translate(pattern), re.IGNORECASE if IS_WINDOWS else 0).match
+
+def _has_glob_magic(component):
+    return any(c in component for c in "*?[")
+
+def iter_glob(pattern):
+    """Lazily yield paths matching a glob pattern, walking directories with scandir"""
+    drive, rest = os.path.splitdrive(pattern)
+    separators = r"[\\/]" if IS_WINDOWS else "/"
+    components = [part for part in re.split(separators, rest) if part]
+    root = drive + (rest[0] if rest[:1] in ("/", os.sep) else "")
+    return _glob_walk(root, components, pattern.endswith(("/", os.sep)))
+
+def _glob_walk(base, components, dirs_only):
+    """Match the remaining path components below base"""
+    if not components:
+        yield base + (os.sep if dirs_only else "")
+        return
+
+    head, rest = components[0], components[1:]
+    if not _has_glob_magic(head):
+        path = os.path.join(base, head) if base else head
+        if rest or dirs_only:
+            if os.path.isdir(path):
+                yield from _glob_walk(path, rest, dirs_only)
+        elif os.path.lexists(path):
+            yield path
+        return
+
+    if head == "**":
+        # Recursive wildcard: zero or more directory levels
+        yield from _glob_walk(base, rest, dirs_only)
+        for path in _glob_dir_matches(base, "*", True):
+            yield from _glob_walk(path, components, dirs_only)
+        return
+
+    for path in _glob_dir_matches(base, head, bool(rest) or dirs_only):
+        yield from _glob_walk(path, rest, dirs_only)
+
+def _glob_dir_matches(base, component, want_dirs):
+    """Yield entries of base matching one component, sorted unless there are very many"""
+    match = _compile_glob(component)
+    show_hidden = component.startswith(".")
+    batch = []
+    try:
+        with os.scandir(base or ".") as it:
+            for entry in it:
+                if entry.name.startswith(".") and not show_hidden:
+                    continue
+                if not match(entry.name):
+                    continue
+                if want_dirs and not entry.is_dir():
+                    continue
+                path = os.path.join(base, entry.name) if base else entry.name
+                if batch is None:
+                    yield path
+                    continue
+                batch.append(path)
+                if len(batch) >= GLOB_SORT_LIMIT:
+                    # Too many to sort in memory: emit what we have and stream the rest
+                    yield from sorted(batch)
+                    batch = None
+    except OSError:
+        return
+    if batch:
+        yield from sorted(batch)
+
+# Aliases, shell functions and the rc file
+
+# Words that start shell compound commands, which only the system shell can run
+SHELL_RESERVED_WORDS = frozenset([
+    "if", "then", "elif", "else", "fi", "case", "esac", "for", "select", "while", "until", "do", "done", "{", "}", "!",
+])
+
+def _split_commands(words):
+    """Split parsed words into the commands separated by ';'.
+
+    A line holding a shell compound command (for ...; do ...; done) is not
+    split, so it reaches the system shell whole.
+    """
+    commands = [[]]
+    for word in words:
+        if word == ";":
+            commands.append([])
+        else:
+            commands[-1].append(word)
+    if len(commands) > 1 and any(command and _plain_word(command[0]) in SHELL_RESERVED_WORDS for command in commands):
+        yield list(words)
+        return
+    yield from commands
+
+def _plain_word(word):
+    """Return the text of an unquoted word, or None if any part is quoted"""
+    if isinstance(word, str) or any(quote for _, quote in word):
+        return None
+    return "".join(text for text, _ in word)
+
+def resolve_alias(words):
+    """Replace a leading alias with its definition, following chained aliases once each"""
+    seen = set()
+    while words:
+        name = _plain_word(words[0])
+        if name is None or name not in aliases or name in seen:
+            break
+        seen.add(name)
+        words = list(parse_command_line(aliases[name])) + list(words[1:])
+    return words
+
+def call_function(name, args):
+    """Run a shell function in-process with its own positional parameters"""
+    function_args_stack.append(list(args))
+    try:
+        running = True
+        for words in shell_functions[name]:
+            running = run_words(words)
+            if not running:
+                break
+        return running
+    finally:
+        function_args_stack.pop()
+
+def compile_rc(text):
+    """Compile rc file text into ('run', words) and ('def', name, commands) steps"""
+    program = []
+    function_name = None
+    body = []
+    for line in text.splitlines():
+        if function_name is not None:
+            stripped = line.strip()
+            if stripped == "}" or stripped.endswith((";}", "; }")):
+                body.append(stripped[:-1])
+                program.append(("def", function_name, _compile_body(body)))
+                function_name = None
+            else:
+                body.append(line)
+            continue
+
+        match = RC_FUNCTION_HEADER.match(line)
+        if match:
+            function_name, rest = match.group(1) or match.group(2), match.group(3).strip()
+            body = []
+            if rest == "}" or rest.endswith((";}", "; }")):
+                # One-line definition: name() { cmd1; cmd2; }
+                program.append(("def", function_name, _compile_body([rest[:-1]])))
+                function_name = None
+            elif rest:
+                body.append(rest)
+            continue
+
+        words = split_command_line(line)
+        if words:
+            program.append(("run", words))
+    if function_name is not None:
+        program.append(("def", function_name, _compile_body(body)))
+    return program
+
+def _compile_body(lines):
+    """Pre-parse the commands of a function body"""
+    commands = []
+    for line in lines:
+        for words in _split_commands(split_command_line(line)):
+            if words:
+                commands.append(words)
+    return commands
+
+def load_compiled_rc(path):
+    """Return the compiled rc program, reusing the cache while the file is unchanged"""
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size, CURRENT_VERSION, RC_CACHE_FORMAT)
+    try:
+        with open(RC_CACHE_FILE, "rb") as cache_file:
+            cached = pickle.load(cache_file)
+        if cached["key"] == key:
+            return cached["program"]
+    except Exception:
+        pass  # Missing or unreadable cache: recompile
+
+    with open(path, "r", errors="replace") as rc_file:
+        program = compile_rc(rc_file.read())
+    try:
+        os.makedirs(YASH_HOME, exist_ok=True)
+        with open(RC_CACHE_FILE + ".tmp", "wb") as cache_file:
+            pickle.dump({"key": key, "program": program}, cache_file, pickle.HIGHEST_PROTOCOL)
+        os.replace(RC_CACHE_FILE + ".tmp", RC_CACHE_FILE)
+    except OSError:
+        pass
+    return program
+
+def source_file(path):
+    """Run an rc file: define its functions and run its commands"""
+    try:
+        if path == RC_FILE:
+            program = load_compiled_rc(path)
+        else:
+            with open(path, "r", errors="replace") as script:
+                program = compile_rc(script.read())
+    except Exception as e:
+        print_color(f"Error loading {path}: {e}", Colors.RED)
+        return
+    for step in program:
+        if step[0] == "def":
+            shell_functions[step[1]] = step[2]
+        else:
+            run_words(step[1])
+
+def load_rc():
+    """Load ~/.yashrc at startup if it exists"""
+    if os.path.isfile(RC_FILE):
+        source_file(RC_FILE)
+
+def alias_command(args):
+    """Define or list aliases"""
+    global last_exit_status
+    if not args:
+        for name, value in sorted(aliases.items()):
+            print(f"alias {name}='{value}'")
+        return
+    for arg in args:
+        if "=" in arg:
+            name, value = arg.split("=", 1)
+            aliases[name] = value
+        elif arg in aliases:
+            print(f"alias {arg}='{aliases[arg]}'")
+        else:
+            last_exit_status = 1
+            print_color(f"alias: {arg}: not found", Colors.RED)
+
+def unalias_command(args):
+    """Remove aliases"""
+    global last_exit_status
+    if not args:
+        print_color("Usage: unalias <name>", Colors.RED)
+        return
+    for name in args:
+        if aliases.pop(name, None) is None:
+            last_exit_status = 1
+            print_color(f"unalias: {name}: not found", Colors.RED)
+
+def export_command(args):
+    """Set environment variables"""
+    if not args:
+        for name, value in sorted(os.environ.items()):
+            print(f"{name}={value}")
+        return
+    for arg in args:
+        if "=" in arg:
+            name, value = arg.split("=", 1)
+            os.environ[name] = value
+
+def unset_command(args):
+    """Remove environment variables and shell functions"""
+    for name in args:
+        os.environ.pop(name, None)
+        shell_functions.pop(name, None)
+
+# Builtin commands that can read piped lines: name -> function(args, lines)
+PIPE_FILTERS = {
+    "cat": cat_lines,
+    "type": cat_lines,
+    "grep": grep_lines,
+    "findstr": grep_lines,
+    "tail": tail_lines,
+    "head": head_lines,
+    "wc": wc_lines,
+    "sort": sort_lines,
+    "uniq": uniq_lines,
+    "cut": cut_lines,
+}
+
+# Every command name handled by dispatch_command
+BUILTIN_COMMANDS = frozenset([
+    "clear", "cls", "help", "ls", "dir", "pwd", "cd", "z", "mkdir", "touch", "echo>", "cat", "type",
+    "echo", "date", "time", "whoami", "grep", "findstr", "sysinfo", "colors", "find", "where",
+    "tree", "ifconfig", "ipconfig", "ps", "tasklist", "ping", "netstat", "ss", "df", "diskspace",
+    "du", "hash", "watch", "cpu", "memory", "top", "taskmgr", "tail", "head", "wc", "sort", "uniq", "cut", "cp", "less", "more", "history", "weather", "update", "alias",
+    "unalias", "export", "set", "unset", "source", ".", "apt", "dnf", "winget", "brew", "exit",
+])
+
 def process_command(cmd_line):
     """Process the entered command"""
     if not cmd_line.strip():
         return True
-        
+
     # Split by spaces, but respect quotes
-    parts = []
-    current = ""
-    in_quotes = False
-    quote_char = None
-    
-    for char in cmd_line:
-        if char in ['"', "'"]:
-            if not in_quotes:
-                in_quotes = True
-                quote_char = char
-            elif char == quote_char:
-                in_quotes = False
-                quote_char = None
-            else:
-                current += char
-        elif char == ' ' and not in_quotes:
-            if current:
-                parts.append(current)
-                current = ""
+    return run_words(parse_command_line(cmd_line))
+
+def _split_pipeline(words):
+    """Split a command into pipeline stages if every later stage is a builtin filter"""
+    stages = [[]]
+    for word in words:
+        if word == "|":
+            stages.append([])
+        elif isinstance(word, str):
+            return None  # Redirections and other operators need the system shell
         else:
-            current += char
-    
-    if current:
-        parts.append(current)
-    
-    command = parts[0].lower() if parts else ""
-    args = parts[1:] if len(parts) > 1 else []
-    
+            stages[-1].append(word)
+    if len(stages) < 2:
+        return None
+    stages = [resolve_alias(stage) for stage in stages]
+    for stage in stages[1:]:
+        name = _plain_word(stage[0]) if stage else None
+        if name is None or name.lower() not in PIPE_FILTERS:
+            return None
+    return stages if stages[0] else None
+
+def _captured_lines(words):
+    """Run a builtin with its output captured, returning the output lines"""
+    buffer = io.StringIO()
+    with contextlib.redirect_stdout(buffer):
+        dispatch_command(words)
+    return iter(buffer.getvalue().splitlines())
+
+def run_pipeline(stages):
+    """Run a pipeline in-process, streaming lines from stage to stage"""
+    global last_exit_status, previous_exit_status
+    previous_exit_status = last_exit_status
+    last_exit_status = 0
+
+    fields = expand_words(stages[0])
+    name = next(fields, "")
+    if name.lower() in PIPE_FILTERS:
+        lines = PIPE_FILTERS[name.lower()](ArgList(fields), None)
+    elif name in shell_functions or name.lower() in BUILTIN_COMMANDS:
+        lines = _captured_lines(stages[0])
+    else:
+        argv = [name] + list(fields)
+        command = subprocess.list2cmdline(argv) if IS_WINDOWS else argv
+        lines = (line.rstrip("\r\n") for line in stream_command(command))
+
+    for stage in stages[1:]:
+        fields = expand_words(stage)
+        name = next(fields)
+        lines = PIPE_FILTERS[name.lower()](ArgList(fields), lines)
+
+    try:
+        for line in lines:
+            print(line)
+    except ValueError as e:
+        last_exit_status = 1
+        print_color(f"Error: {e}", Colors.RED)
+    except KeyboardInterrupt:
+        print()
+    finally:
+        close = getattr(lines, "close", None)
+        if close:
+            close()
+    return True
+
+def run_words(words):
+    """Run parsed words, which may hold several ';'-separated commands"""
+    running = True
+    for command_words in _split_commands(words):
+        command_words = resolve_alias(command_words)
+        if not command_words:
+            continue
+        stages = _split_pipeline(command_words)
+        if stages:
+            running = run_pipeline(stages)
+        elif any(isinstance(word, str) for word in command_words):
+            # Pipes, redirections and the like are left to the system shell
+            running = run_external(words_to_text(command_words))
+        else:
+            running = dispatch_command(command_words)
+        if not running:
+            break
+    return running
+
+def dispatch_command(words):
+    """Expand a single command and run the matching builtin, function or program"""
+    global last_exit_status, previous_exit_status
+
+    # Arguments expand lazily, so $? must keep seeing the status from before this command
+    previous_exit_status = last_exit_status
+    last_exit_status = 0
+    fields = expand_words(words)
+    name = next(fields, "")
+    command = name.lower()
+    args = ArgList(fields)
+
+    if name in shell_functions:
+        return call_function(name, args)
+
     # Process commands with OS-specific alternatives
     if command in ["clear", "cls"]:
         clear_screen()
@@ -827,12 +3656,18 @@ def process_command(cmd_line):
         pwd_command()
     elif command == "cd":
         cd_command(args)
+    elif command == "z":
+        z_command(args)
     elif command == "mkdir":
         mkdir_command(args)
     elif command in ["touch", "echo>"]:
         touch_command(args)
     elif command in ["cat", "type"]:
         cat_command(args)
+    elif command == "tail":
+        tail_command(args)
+    elif command in ["head", "wc", "sort", "uniq", "cut"]:
+        filter_command(PIPE_FILTERS[command], args)
     elif command == "echo":
         echo_command(args)
     elif command in ["date", "time"]:
@@ -859,8 +3694,41 @@ def process_command(cmd_line):
         netstat_command()
     elif command in ["df", "diskspace"]:
         df_command()
+    elif command == "du":
+        du_command(args)
+    elif command == "hash":
+        hash_command(args)
+    elif command == "watch":
+        watch_command(args)
+    elif command == "cpu":
+        cpu_usage()
+    elif command == "memory":
+        memory_usage()
     elif command in ["top", "taskmgr"]:
         top_command()
+    elif command == "cp":
+        cp_command(args)
+    elif command in ["less", "more"]:
+        less_command(args)
+    elif command == "history":
+        history_command()
+    elif command == "alias":
+        alias_command(args)
+    elif command == "unalias":
+        unalias_command(args)
+    elif command in ["export", "set"]:
+        export_command(args)
+    elif command == "unset":
+        unset_command(args)
+    elif command in ["source", "."]:
+        if args:
+            source_file(args[0])
+        else:
+            print_color("Usage: source <file>", Colors.RED)
+    elif command == "weather":
+        weather_command(args)
+    elif command == "update":
+        update_yash(args)
     # Package management    
     elif command == "apt" and len(args) >= 1:
         if args[0] == "install" and len(args) >= 2:
@@ -893,19 +3761,587 @@ def process_command(cmd_line):
     elif command == "exit":
         return False
     elif command:
-        # Try to execute as system command
-        print_color(f"Attempting to execute system command: {cmd_line}", Colors.YELLOW)
-        result = execute_command(cmd_line)
-        if result:
-            print(result)
-        else:
-            print_color(f"Unknown command: {command}. Type 'help' for list of commands.", Colors.RED)
+        # Try to execute as system command, with the arguments already expanded
+        return run_external(words_to_text(words), [name] + list(args))
     
     return True
 
+def run_external(cmd_line, argv=None):
+    """Run a command line that no builtin handles as a system command"""
+    print_color(f"Attempting to execute system command: {cmd_line}", Colors.YELLOW)
+    if argv is None:
+        command = cmd_line
+    elif IS_WINDOWS:
+        # cmd.exe builtins such as dir need the shell
+        command = subprocess.list2cmdline(argv)
+    else:
+        command = argv
+    printed = page_output(stream_command(command))
+    if not printed and last_exit_status == 127:
+        print_color(f"Unknown command: {(argv or [cmd_line])[0]}. Type 'help' for list of commands.", Colors.RED)
+    return True
+
+def less_command(args):
+    """Page through files"""
+    if not args:
+        print_color("Usage: less <filename> [filename...]", Colors.RED)
+        return
+
+    def file_lines():
+        global last_exit_status
+        for filename in stream_args(args):
+            try:
+                with open(filename, 'r', errors='replace') as file:
+                    yield from file
+            except Exception as e:
+                last_exit_status = 1
+                yield f"{Colors.RED}Error: {e}{Colors.ENDC}"
+
+    page_output(file_lines())
+
+# Daemon mode: one long-lived Yash serving many sessions over a Unix socket.
+# Messages are JSON objects, one per line. A client opens with
+# {"cwd": ..., "env": {...}}, then sends {"command": "..."} and receives
+# {"output": "..."} messages followed by {"status": n, "cwd": ..., "exit": bool}.
+# {"interrupt": true} stops the running command.
+
+# Builtins that read or change state the daemon shares between sessions.
+# They are quick, so they run in the daemon itself; other builtins run in
+# a forked child so a slow one (tail -f, watch, du) never holds up others.
+DAEMON_SESSION_COMMANDS = frozenset([
+    "cd", "z", "pwd", "export", "set", "unset", "alias", "unalias", "history", "sysinfo", "exit",
+])
+
+class _SessionOutput(io.TextIOBase):
+    """stdout for a builtin running on behalf of a daemon session"""
+    def __init__(self, session):
+        self.session = session
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        if self.session.interrupted:
+            raise KeyboardInterrupt
+        self.session.queue_output(text)
+        return len(text)
+
+def _mapping_changes(before, after):
+    """Return (changed items, removed keys) between two dicts"""
+    changed = {key: value for key, value in after.items() if key not in before or before[key] != value}
+    return changed, [key for key in before if key not in after]
+
+class DaemonSession:
+    """The cwd, environment and exit status of one client of the daemon.
+
+    Builtins in DAEMON_SESSION_COMMANDS use the process-wide cwd,
+    environment and stdout, so they run one at a time in a worker thread
+    under the daemon's lock with the session's state swapped in. Any other
+    builtin line runs in a forked child, which sends back the session's new
+    state and any alias or function changes when it finishes. Plain system
+    commands only need the lock to expand their arguments. Children and
+    system commands run concurrently, each in its own process group so an
+    interrupt reaches everything they started.
+    """
+    def __init__(self, writer, lock, cwd=None, env=None):
+        self.writer = writer
+        self.lock = lock
+        self.loop = asyncio.get_running_loop()
+        self.cwd = cwd or os.getcwd()
+        self.env = dict(env) if env else dict(os.environ)
+        self.status = 0
+        self.process = None
+        self.child = None
+        self.interrupted = False
+        self.pending = []
+        self.pending_lock = threading.Lock()
+
+    def send(self, message):
+        if not self.writer.is_closing():
+            self.writer.write(json.dumps(message).encode() + b"\n")
+
+    async def drain(self):
+        """Wait for the client to read what was sent; output for a client that has gone is dropped"""
+        if self.writer.is_closing():
+            return
+        with contextlib.suppress(ConnectionError):
+            await self.writer.drain()
+
+    def queue_output(self, text):
+        """Queue output from the builtin thread, waking the event loop to send it"""
+        with self.pending_lock:
+            self.pending.append(text)
+            wake = len(self.pending) == 1
+        if wake:
+            self.loop.call_soon_threadsafe(self.flush_output)
+        if self.writer.transport.get_write_buffer_size() > 1024 * 1024:
+            # Slow client: wait for it rather than buffering without limit
+            asyncio.run_coroutine_threadsafe(self.drain(), self.loop).result()
+
+    def flush_output(self):
+        with self.pending_lock:
+            text = "".join(self.pending)
+            self.pending.clear()
+        if text:
+            self.send({"output": text})
+
+    def _signal(self, signum):
+        for pid in (self.child, self.process and self.process.returncode is None and self.process.pid):
+            if pid:
+                with contextlib.suppress(OSError):
+                    os.killpg(pid, signum)
+
+    def interrupt(self):
+        """Stop the running command, like Ctrl+C.
+
+        Children and system commands get SIGINT; a builtin running in the
+        daemon gets KeyboardInterrupt at its next write.
+        """
+        self.interrupted = True
+        self._signal(signal.SIGINT)
+
+    def kill(self):
+        """Kill whatever the session is running"""
+        self.interrupted = True
+        self._signal(signal.SIGKILL)
+
+    def _enter(self):
+        global last_exit_status
+        self.saved_stdin = sys.stdin
+        sys.stdin = io.StringIO()  # Builtins that prompt see end of input
+        if dict(os.environ) != self.env:
+            os.environ.clear()
+            os.environ.update(self.env)
+        try:
+            os.chdir(self.cwd)
+        except OSError as e:
+            print(f"{Colors.RED}Error: {e}{Colors.ENDC}")
+            os.chdir(os.path.expanduser("~"))
+        last_exit_status = self.status
+
+    def _leave(self):
+        sys.stdin = self.saved_stdin
+        self.cwd = os.getcwd()
+        self.env = dict(os.environ)
+        self.status = last_exit_status
+
+    def _system_command(self, words):
+        """Return the argv or shell text if words are a lone system command, else None"""
+        global previous_exit_status
+        if not words or ";" in words:
+            return None
+        words = resolve_alias(list(words))
+        if not words or isinstance(words[0], str) or _split_pipeline(words):
+            return None
+        name = "".join(text for text, _ in words[0])
+        if name.lower() in BUILTIN_COMMANDS or name in shell_functions:
+            return None
+        if any(isinstance(word, str) for word in words):
+            return words_to_text(words)  # Redirections and pipes go to the system shell
+        previous_exit_status = last_exit_status
+        argv = list(expand_words(words))
+        if not argv or argv[0].lower() in BUILTIN_COMMANDS or argv[0] in shell_functions:
+            return None
+        return argv
+
+    def _runs_in_daemon(self, words):
+        """Check that every command in words is a builtin in DAEMON_SESSION_COMMANDS"""
+        for command_words in _split_commands(words):
+            command_words = resolve_alias(command_words)
+            if not command_words:
+                continue
+            if any(isinstance(word, str) for word in command_words):
+                return False
+            name = "".join(text for text, _ in command_words[0])
+            if name.lower() not in DAEMON_SESSION_COMMANDS or name in shell_functions:
+                return False
+        return True
+
+    def run_locked(self, cmd_line):
+        """Run cmd_line in a worker thread with this session's state swapped in.
+
+        Returns (action, value): ("done", running) when the line ran here,
+        ("system", command) for a lone system command and ("fork", words)
+        for builtins that must run in a child. The caller runs those.
+        """
+        global last_exit_status
+        with contextlib.redirect_stdout(_SessionOutput(self)):
+            self._enter()
+            try:
+                words = parse_command_line(cmd_line)
+                command = self._system_command(words)
+                if command is not None:
+                    return "system", command
+                if not self._runs_in_daemon(words):
+                    return "fork", words
+                try:
+                    return "done", run_words(words)
+                except KeyboardInterrupt:
+                    last_exit_status = 130
+                    return "done", True
+            finally:
+                self._leave()
+
+    async def _relay(self, stream):
+        """Send everything read from stream to the client"""
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        while True:
+            chunk = await stream.read(64 * 1024)
+            text = decoder.decode(chunk, final=not chunk)
+            if text:
+                self.send({"output": text})
+                await self.drain()
+            if not chunk:
+                break
+
+    async def run_system_command(self, command):
+        """Run a system command with the session's cwd and environment, streaming its output"""
+        options = dict(cwd=self.cwd, env=self.env, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                       stderr=subprocess.STDOUT, start_new_session=True)
+        try:
+            if isinstance(command, str):
+                self.process = await asyncio.create_subprocess_shell(command, **options)
+            else:
+                path = command[0] if os.sep in command[0] else lookup_command(command[0], self.env.get("PATH", os.defpath))
+                if path is None:
+                    raise FileNotFoundError(command[0])
+                self.process = await asyncio.create_subprocess_exec(path, *command[1:], **options)
+        except FileNotFoundError:
+            self.status = 127
+            self.send({"output": f"{Colors.RED}Unknown command: {command[0]}. Type 'help' for list of commands.{Colors.ENDC}\n"})
+            return
+        except OSError as e:
+            self.status = 126
+            self.send({"output": f"{Colors.RED}Error executing command: {e}{Colors.ENDC}\n"})
+            return
+
+        try:
+            await self._relay(self.process.stdout)
+            returncode = await self.process.wait()
+            self.status = returncode if returncode >= 0 else 128 - returncode
+        finally:
+            if self.process.returncode is None:
+                self.process.kill()
+                await self.process.wait()
+            self.process = None
+
+    def _child_main(self, words, output_fd, state_fd):
+        """Run words in a forked child with the session's state, then report that state"""
+        global last_exit_status
+        os.setsid()
+        signal.set_wakeup_fd(-1)
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+        # stdout and stderr go to the client, stdin is empty; drop the daemon's other descriptors
+        null_fd = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(null_fd, 0)
+        os.dup2(output_fd, 1)
+        os.dup2(output_fd, 2)
+        os.dup2(state_fd, 3)
+        os.closerange(4, os.sysconf("SC_OPEN_MAX"))
+        _http_pool.clear()
+        sys.stdin = open(0, closefd=False)
+        sys.stdout = sys.stderr = open(1, "w", buffering=1, errors="replace", closefd=False)
+
+        os.environ.clear()
+        os.environ.update(self.env)
+        try:
+            os.chdir(self.cwd)
+        except OSError as e:
+            print_color(f"Error: {e}", Colors.RED)
+            os.chdir(os.path.expanduser("~"))
+        last_exit_status = self.status
+        aliases_before = dict(aliases)
+        functions_before = dict(shell_functions)
+
+        running = True
+        try:
+            running = run_words(words)
+        except KeyboardInterrupt:
+            last_exit_status = 130
+        except Exception as e:
+            last_exit_status = 1
+            print_color(f"Error: {e}", Colors.RED)
+        sys.stdout.flush()
+        state = {"cwd": os.getcwd(), "env": dict(os.environ), "status": last_exit_status, "running": running,
+                 "aliases": _mapping_changes(aliases_before, aliases),
+                 "functions": _mapping_changes(functions_before, shell_functions)}
+        with open(3, "wb") as state_file:
+            pickle.dump(state, state_file)
+
+    def _fork(self, words):
+        """Start a child running words, returning (pid, output fd, state fd)"""
+        output_r, output_w = os.pipe()
+        state_r, state_w = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            try:
+                os.close(output_r)
+                os.close(state_r)
+                self._child_main(words, output_w, state_w)
+            finally:
+                os._exit(0)  # Never return into the daemon's event loop
+        os.close(output_w)
+        os.close(state_w)
+        return pid, output_r, state_r
+
+    async def run_child(self, words):
+        """Run builtins in a forked child, streaming its output, then adopt the state it reports"""
+        async with self.lock:
+            # Fork while no builtin thread is running, so the child inherits no held locks
+            self.child, output_fd, state_fd = self._fork(words)
+        output_file = open(output_fd, "rb", buffering=0)
+        state_file = open(state_fd, "rb")
+        running = True
+        data = b""
+        wait_status = None
+        try:
+            stream = asyncio.StreamReader(limit=1024 * 1024)
+            transport, _ = await self.loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(stream), output_file)
+            try:
+                await self._relay(stream)
+            finally:
+                transport.close()
+            data = await asyncio.to_thread(state_file.read)
+            _, wait_status = await asyncio.to_thread(os.waitpid, self.child, 0)
+        finally:
+            # Whatever went wrong, leave no open pipe and no unreaped child behind
+            output_file.close()
+            state_file.close()
+            if wait_status is None:
+                with contextlib.suppress(OSError):
+                    os.killpg(self.child, signal.SIGKILL)
+                _, wait_status = await asyncio.to_thread(os.waitpid, self.child, 0)
+            self.child = None
+
+        try:
+            state = pickle.loads(data)
+        except Exception:
+            # The child died before reporting, e.g. it was killed
+            returncode = os.waitstatus_to_exitcode(wait_status)
+            self.status = returncode if returncode >= 0 else 128 - returncode
+            return running
+        self.cwd, self.env, self.status, running = state["cwd"], state["env"], state["status"], state["running"]
+        for table, (changed, removed) in ((aliases, state["aliases"]), (shell_functions, state["functions"])):
+            table.update(changed)
+            for name in removed:
+                table.pop(name, None)
+        return running
+
+    async def execute(self, cmd_line):
+        """Run one command line and report its status and the session's cwd"""
+        self.interrupted = False
+        running = True
+        add_to_history(cmd_line)
+        try:
+            async with self.lock:
+                action, value = await asyncio.to_thread(self.run_locked, cmd_line)
+            self.flush_output()
+            if action == "done":
+                running = value
+            elif action == "system":
+                await self.run_system_command(value)
+            else:
+                running = await self.run_child(value)
+        except Exception as e:
+            self.flush_output()
+            self.status = 1
+            self.send({"output": f"{Colors.RED}Error: {e}{Colors.ENDC}\n"})
+        self.send({"status": self.status, "cwd": self.cwd, "exit": not running})
+        await self.drain()
+
+async def handle_daemon_client(lock, reader, writer):
+    """Serve one client connection of the daemon"""
+    session = None
+    task = None
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            try:
+                message = json.loads(line)
+                if not isinstance(message, dict):
+                    raise ValueError("expected a JSON object")
+            except ValueError as e:
+                writer.write(json.dumps({"error": f"Bad message: {e}"}).encode() + b"\n")
+                continue
+            if session is None:
+                session = DaemonSession(writer, lock, message.get("cwd"), message.get("env"))
+            if message.get("interrupt"):
+                session.interrupt()
+            elif "command" in message:
+                if task and not task.done():
+                    session.send({"error": "A command is already running"})
+                else:
+                    task = asyncio.create_task(session.execute(str(message["command"])))
+    except (ConnectionError, ValueError):
+        pass  # Client went away or sent an oversized line
+    finally:
+        if task and not task.done():
+            # The client is gone: interrupt its command, and kill it if it does not stop
+            session.interrupt()
+            try:
+                await asyncio.wait_for(asyncio.shield(task), DAEMON_KILL_DELAY)
+            except asyncio.TimeoutError:
+                session.kill()
+            except Exception:
+                pass  # The command failed; it is finished either way
+            with contextlib.suppress(Exception):
+                await task
+        writer.close()
+
+def daemon_running(path):
+    """Check whether a daemon is accepting connections on path"""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(path)
+        return True
+    except OSError:
+        return False
+
+def run_daemon(path=DAEMON_SOCKET):
+    """Serve Yash sessions on a Unix domain socket until interrupted"""
+    if IS_WINDOWS or not hasattr(socket, "AF_UNIX"):
+        print_color("Daemon mode needs Unix domain sockets, which are not available here", Colors.RED)
+        return 1
+    if os.path.exists(path):
+        if daemon_running(path):
+            print_color(f"A Yash daemon is already listening on {path}", Colors.RED)
+            return 1
+        os.unlink(path)  # Left behind by a daemon that did not shut down cleanly
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    # rc aliases and functions, caches and history are shared by every session
+    load_rc()
+
+    async def serve():
+        lock = asyncio.Lock()
+        old_umask = os.umask(0o177)  # Only this user may connect
+        try:
+            server = await asyncio.start_unix_server(functools.partial(handle_daemon_client, lock),
+                                                     path=path, limit=16 * 1024 * 1024)
+        finally:
+            os.umask(old_umask)
+        print_color(f"Yash daemon listening on {path}", Colors.GREEN)
+        stop = asyncio.Event()
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop.set)
+        async with server:
+            await stop.wait()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        with contextlib.suppress(OSError):
+            os.unlink(path)
+    return 0
+
+def daemon_client(path=DAEMON_SOCKET, cmd_line=None):
+    """Attach to a daemon and run cmd_line, or read commands interactively.
+
+    Returns the exit status of the last command.
+    """
+    if IS_WINDOWS or not hasattr(socket, "AF_UNIX"):
+        print_color("Daemon mode needs Unix domain sockets, which are not available here", Colors.RED)
+        return 1
+    try:
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        client.connect(path)
+    except OSError as e:
+        client.close()
+        if cmd_line is not None:
+            # No daemon: run the command here instead
+            load_rc()
+            process_command(cmd_line)
+            return last_exit_status
+        print_color(f"Could not connect to the Yash daemon at {path}: {e}", Colors.RED)
+        print_color("Start one with: python yash.py --daemon", Colors.YELLOW)
+        return 1
+
+    replies = client.makefile("rb")
+
+    def send(message):
+        client.sendall(json.dumps(message).encode() + b"\n")
+
+    def run(line):
+        send({"command": line})
+        while True:
+            try:
+                reply = replies.readline()
+                if not reply:
+                    print_color("Connection to the Yash daemon was lost", Colors.RED)
+                    return {"status": 1, "exit": True}
+                message = json.loads(reply)
+            except KeyboardInterrupt:
+                send({"interrupt": True})
+                continue
+            if "output" in message:
+                sys.stdout.write(message["output"])
+                sys.stdout.flush()
+            elif "error" in message:
+                print_color(message["error"], Colors.RED)
+                return {"status": 1, "cwd": None, "exit": False}
+            else:
+                return message
+
+    with client, replies:
+        send({"cwd": os.getcwd(), "env": dict(os.environ)})
+        if cmd_line is not None:
+            return run(cmd_line)["status"]
+
+        status = 0
+        cwd = os.getcwd()
+        home = os.path.expanduser("~")
+        while True:
+            shown = "~" + cwd[len(home):] if cwd.startswith(home) else cwd
+            try:
+                line = input(f"{Colors.BLUE}➜ {Colors.CYAN}{shown}{Colors.ENDC} % ")
+            except KeyboardInterrupt:
+                print()
+                continue
+            except EOFError:
+                print()
+                break
+            if not line.strip():
+                continue
+            result = run(line)
+            status = result["status"]
+            cwd = result.get("cwd") or cwd
+            if result.get("exit"):
+                break
+        return status
+
+def run_cli(argv):
+    """Start the interactive shell, or handle --daemon, --attach and -c"""
+    usage = "Usage: yash.py [--daemon | --attach | -c command] [--socket path]"
+    path = DAEMON_SOCKET
+    if "--socket" in argv:
+        index = argv.index("--socket")
+        if index + 1 >= len(argv):
+            print_color(usage, Colors.RED)
+            return 2
+        path = argv[index + 1]
+        argv = argv[:index] + argv[index + 2:]
+
+    if not argv:
+        main()
+        return 0
+    if argv == ["--daemon"]:
+        return run_daemon(path)
+    if argv == ["--attach"]:
+        return daemon_client(path)
+    if len(argv) == 2 and argv[0] == "-c":
+        return daemon_client(path, argv[1])
+    print_color(usage, Colors.RED)
+    return 2
+
 def main():
     """Main function to run the Yash Terminal"""
     clear_screen()
+    load_rc()
     check_for_updates()
     
     # Get user info
@@ -929,6 +4365,9 @@ def main():
     
     running = True
     while running:
+        # Announce a background update that finished since the last prompt
+        report_update_result()
+
         # Display prompt with pwd
         cwd = os.getcwd()
         home = os.path.expanduser("~")
@@ -946,6 +4385,7 @@ def main():
         user_input = input(prompt)
         
         # Process the command
+        add_to_history(user_input)
         running = process_command(user_input)
     
     print_color(f"\nLogging out... Goodbye, {username}!", Colors.YELLOW)
@@ -953,4 +4393,4 @@ def main():
     print_color("Yash Terminal has been terminated.", Colors.RED)
 
 if __name__ == "__main__":
-        main()
+    sys.exit(run_cli(sys.argv[1:]))